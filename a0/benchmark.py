@@ -0,0 +1,168 @@
+"""
+Assignment 0 benchmarks
+CSC148, Winter 2020
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+=== Module Description ===
+
+This file contains a benchmark suite for the Gym. It times loading a synthetic
+gym from a file, scheduling its offerings, registering its clients, probing its
+offerings and computing its payroll, and prints the results. Given --output, it
+also writes them as JSON to that file, so that they can be compared across
+commits.
+
+Run it with, for example:
+
+    python benchmark.py --seed 148 --weeks 8 --output results.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict
+
+from gym import load_data
+from workload import FIRST_HOUR, generate_workload
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    """Return the shortest time, in seconds, that calling <function> took out
+    of <repeat> calls.
+
+    Precondition: repeat > 0
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(seed: int, scale: Dict[str, int], repeat: int = 3) \
+        -> Dict[str, Any]:
+    """Return the results of running every benchmark on the synthetic gym
+    generated from <seed> and <scale>, the keyword arguments given to
+    workload.generate_workload.
+
+    The returned dictionary records the seed, the scale and the Python version
+    used, and maps 'results' to a dictionary from each benchmark's name to the
+    best time in seconds it took out of <repeat> runs.
+
+    Precondition: repeat > 0
+    """
+    workload = generate_workload(seed, **scale)
+    results = {}
+
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            workload.write(f)
+        results['load_data'] = best_time(lambda: load_data(path, 'Bench'),
+                                         repeat)
+    finally:
+        os.remove(path)
+
+    def schedule() -> None:
+        gym = workload.empty_gym('Bench')
+        for when, offerings in workload.offerings:
+            for instr_id, workout_name, room_name in offerings:
+                gym.schedule_workout_class(when, room_name, workout_name,
+                                           instr_id)
+    results['schedule_workout_class'] = best_time(schedule, repeat)
+
+    gym = workload.empty_gym('Bench')
+    for when, offerings in workload.offerings:
+        for instr_id, workout_name, room_name in offerings:
+            gym.schedule_workout_class(when, room_name, workout_name, instr_id)
+
+    def register_burst() -> None:
+        trial = gym.fork()
+        for when, registrations in workload.registrations:
+            for client, workout_name in registrations:
+                trial.register(when, client, workout_name)
+    results['register'] = best_time(register_burst, repeat)
+
+    times = [when for when, _ in workload.offerings]
+    results['offerings_at'] = best_time(
+        lambda: [gym.offerings_at(when) for when in times], repeat)
+
+    if times:
+        first, last = times[0], times[-1]
+        for name, span in [('week', timedelta(weeks=1)),
+                           ('month', timedelta(weeks=4)),
+                           ('all', last - first + timedelta(hours=1))]:
+            results['payroll_' + name] = best_time(
+                lambda s=span: gym.payroll(first, first + s, 25.0), repeat)
+        weeks = [FIRST_HOUR + timedelta(weeks=i)
+                 for i in range((last - FIRST_HOUR).days // 7 + 2)]
+        results['payroll_periods_weekly'] = best_time(
+            lambda: list(gym.payroll_periods(weeks, 25.0)), repeat)
+
+    return {'seed': seed, 'scale': dict(scale),
+            'python': platform.python_version(), 'results': results}
+
+
+def compare_results(old: Dict[str, Any], new: Dict[str, Any]) \
+        -> Dict[str, float]:
+    """Return the ratio of the time each benchmark took in <new> to the time it
+    took in <old>, for the benchmarks that appear in both. A ratio below 1.0
+    means the benchmark got faster.
+
+    >>> compare_results({'results': {'register': 2.0, 'payroll_all': 1.0}},
+    ...                 {'results': {'register': 1.0}})
+    {'register': 0.5}
+    """
+    ratios = {}
+    for name, seconds in new['results'].items():
+        if name in old['results'] and old['results'][name] > 0:
+            ratios[name] = seconds / old['results'][name]
+    return ratios
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Gym.')
+    parser.add_argument('--seed', type=int, default=148)
+    parser.add_argument('--instructors', type=int, default=20)
+    parser.add_argument('--rooms', type=int, default=5)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--clients-per-slot', type=int, default=20)
+    parser.add_argument('--hours-per-day', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None,
+                        help='a file to write the results to as JSON')
+    parser.add_argument('--compare', default=None,
+                        help='a previous output file to compare against')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.seed, {
+        'num_instructors': args.instructors,
+        'num_rooms': args.rooms,
+        'num_classes': args.classes,
+        'num_weeks': args.weeks,
+        'clients_per_slot': args.clients_per_slot,
+        'hours_per_day': args.hours_per_day,
+    }, args.repeat)
+    if args.output is not None:
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2, sort_keys=True)
+            out.write('\n')
+    for benchmark, elapsed in sorted(report['results'].items()):
+        print('{0:<28}{1:.6f}s'.format(benchmark, elapsed))
+
+    if args.compare is not None:
+        with open(args.compare) as previous:
+            baseline = json.load(previous)
+        for benchmark, ratio in sorted(compare_results(baseline,
+                                                       report).items()):
+            print('{0:<28}{1:.2f}x'.format(benchmark, ratio))
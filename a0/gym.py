@@ -15,14 +15,29 @@ All of the files in this directory and all subdirectories are:
 Copyright (c) 2020 Mario Badr, Christine Murad, Diane Horton, Misha Schwartz,
 Sophia Huynh and Jaisie Sin
 """
+from __future__ import annotations
+import bisect
+import csv
+import heapq
+import time
 from datetime import datetime
-from typing import Dict, List, TextIO, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, \
+    Set, TextIO, Tuple
+from weakref import WeakSet
 
 
 # The additional pay per hour instructors receive for each certificate they
 # hold.
 BONUS_RATE = 1.5
 
+# The upper bounds, in seconds, of the buckets of the latency histograms
+# recorded by GymMetrics.
+LATENCY_BUCKETS = (0.000001, 0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+# The Gym methods that are timed while a Gym's metrics are enabled.
+INSTRUMENTED_OPERATIONS = ('schedule_workout_class', 'register',
+                           'offerings_at', 'instructor_hours', 'payroll')
+
 
 class WorkoutClass:
     """A workout class that can be offered at a gym.
@@ -158,6 +173,157 @@ class Instructor:
             return False
 
 
+class GymMetrics:
+    """Call counts, latency histograms and rejection reasons recorded for the
+    operations of one or more Gyms.
+
+    === Private Attributes ===
+    _calls: The number of times each operation was called. Each key is the
+        name of an operation.
+    _latencies: The latency histogram of each operation. Each key is the name
+        of an operation and its value is a list with the number of calls that
+        took at most LATENCY_BUCKETS[i] seconds (but more than the previous
+        bound) at index i, followed by the number of calls that took longer
+        than all of the bounds.
+    _total_seconds: The total time spent in each operation. Each key is the
+        name of an operation.
+    _rejections: The reasons operations returned False. Each key is the name of
+        an operation and its value is a dictionary mapping each reason to the
+        number of times it was given.
+
+    === Representation Invariants ===
+    - _calls, _latencies and _total_seconds have the same keys.
+    - sum(_latencies[op]) == _calls[op] for every key op in _calls.
+    """
+    _calls: Dict[str, int]
+    _latencies: Dict[str, List[int]]
+    _total_seconds: Dict[str, float]
+    _rejections: Dict[str, Dict[str, int]]
+
+    def __init__(self) -> None:
+        """Initialize a new GymMetrics with nothing recorded.
+
+        >>> GymMetrics().snapshot()
+        {'calls': {}, 'latency': {}, 'rejections': {}}
+        """
+        self._calls = {}
+        self._latencies = {}
+        self._total_seconds = {}
+        self._rejections = {}
+
+    def record(self, operation: str, seconds: float) -> None:
+        """Record a call to <operation> that took <seconds> seconds.
+
+        >>> metrics = GymMetrics()
+        >>> metrics.record('register', 0.0005)
+        >>> metrics.snapshot()['calls']
+        {'register': 1}
+        """
+        if operation not in self._calls:
+            self._calls[operation] = 0
+            self._latencies[operation] = [0] * (len(LATENCY_BUCKETS) + 1)
+            self._total_seconds[operation] = 0.0
+        self._calls[operation] += 1
+        self._latencies[operation][bisect.bisect_left(LATENCY_BUCKETS,
+                                                      seconds)] += 1
+        self._total_seconds[operation] += seconds
+
+    def reject(self, operation: str, reason: str) -> None:
+        """Record that a call to <operation> returned False because of
+        <reason>.
+
+        >>> metrics = GymMetrics()
+        >>> metrics.reject('register', 'full')
+        >>> metrics.snapshot()['rejections']
+        {'register': {'full': 1}}
+        """
+        if operation not in self._rejections:
+            self._rejections[operation] = {}
+        reasons = self._rejections[operation]
+        reasons[reason] = reasons.get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a dictionary with a copy of everything recorded so far.
+
+        The dictionary has three keys:
+            - 'calls' maps each operation to its number of calls,
+            - 'latency' maps each operation to a dictionary with its cumulative
+              histogram ('buckets', mapping each bound in LATENCY_BUCKETS and
+              float('inf') to the number of calls that took at most that many
+              seconds), its total time in seconds ('sum') and its number of
+              calls ('count'), and
+            - 'rejections' maps each operation to a dictionary mapping each
+              reason it returned False to the number of times it did.
+
+        >>> metrics = GymMetrics()
+        >>> metrics.record('payroll', 0.5)
+        >>> latency = metrics.snapshot()['latency']['payroll']
+        >>> latency['buckets'][0.1], latency['buckets'][1.0], latency['count']
+        (0, 1, 1)
+        """
+        latency = {}
+        for operation, counts in self._latencies.items():
+            buckets = {}
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), counts):
+                total += count
+                buckets[bound] = total
+            latency[operation] = {'buckets': buckets,
+                                  'sum': self._total_seconds[operation],
+                                  'count': self._calls[operation]}
+        rejections = {}
+        for operation, reasons in self._rejections.items():
+            rejections[operation] = dict(reasons)
+        return {'calls': dict(self._calls), 'latency': latency,
+                'rejections': rejections}
+
+    def to_prometheus(self) -> str:
+        """Return everything recorded so far in the Prometheus text exposition
+        format.
+
+        >>> metrics = GymMetrics()
+        >>> metrics.reject('register', 'full')
+        >>> print(metrics.to_prometheus())
+        # TYPE gym_calls_total counter
+        # TYPE gym_latency_seconds histogram
+        # TYPE gym_rejections_total counter
+        gym_rejections_total{operation="register",reason="full"} 1
+        """
+        lines = ['# TYPE gym_calls_total counter']
+        for operation, count in self._calls.items():
+            lines.append('gym_calls_total{{operation="{0}"}} {1}'.format(
+                operation, count))
+        lines.append('# TYPE gym_latency_seconds histogram')
+        for operation, latency in self.snapshot()['latency'].items():
+            for bound, count in latency['buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('gym_latency_seconds_bucket{{operation="{0}",'
+                             'le="{1}"}} {2}'.format(operation, le, count))
+            lines.append('gym_latency_seconds_sum{{operation="{0}"}} '
+                         '{1}'.format(operation, latency['sum']))
+            lines.append('gym_latency_seconds_count{{operation="{0}"}} '
+                         '{1}'.format(operation, latency['count']))
+        lines.append('# TYPE gym_rejections_total counter')
+        for operation, reasons in self._rejections.items():
+            for reason, count in reasons.items():
+                lines.append('gym_rejections_total{{operation="{0}",'
+                             'reason="{1}"}} {2}'.format(operation, reason,
+                                                         count))
+        return '\n'.join(lines)
+
+
+def _timed(metrics: GymMetrics, operation: str,
+           method: Callable[..., Any]) -> Callable[..., Any]:
+    """Return a function that calls <method> and records how long it took in
+    <metrics> as a call to <operation>.
+    """
+    def timed_method(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        metrics.record(operation, time.perf_counter() - start)
+        return result
+    return timed_method
+
 
 class Gym:
     """A gym that hosts workout classes taught by instructors.
@@ -184,6 +350,26 @@ class Gym:
         the offering. The tuple elements record the instructor teaching the
         class, the workout class itself, and a list of registered clients. Each
         client is represented by a unique string.
+    _openings: The remaining capacity of the offerings in _schedule. Each key
+        is a date and time and its value is a nested dictionary. Each key in
+        the nested dictionary is the name of a workout class offered then, and
+        its value is a heap of (-remaining capacity, room name) tuples, one for
+        each room the workout class is offered in at that date and time, so
+        that the least loaded room is always first.
+    _registered: The clients registered for an offering at each date and time
+        in _schedule. Each key is a date and time and its value is the set of
+        clients registered for any of the offerings that start then.
+    _owned: The dates and times whose offerings in _schedule, _openings and
+        _registered belong to this Gym alone. The offerings at any other date
+        and time may be shared with a Gym this one was forked from, or that was
+        forked from it, and are copied before they are modified.
+    _parent: The Gym this Gym was forked from, or None if it was not forked.
+    _forks: The Gyms forked from this Gym that are still in use.
+    _changed: The dates and times whose offerings this Gym or _parent has
+        modified since this Gym was forked. The offerings at every other date
+        and time are still shared by the two Gyms.
+    _metrics: Where the operations of this Gym are recorded, or None if they
+        are not being recorded.
 
     === Representation Invariants ===
     - Each key in _schedule is for a time that is on the hour.
@@ -197,6 +383,11 @@ class Gym:
       <r> does not occur as a key in _schedule[d]
     - If there are no offerings at date and time <d> in any room at all, then
       <d> does not occur as a key in _schedule
+    - Each offering in _schedule has exactly one entry in _openings, and its
+      remaining capacity is the capacity of its room minus the number of
+      clients registered for it.
+    - _registered has the same keys as _schedule, and _registered[d] holds
+      exactly the clients registered for the offerings in _schedule[d].
     """
     name: str
     _instructors: Dict[int, Instructor]
@@ -204,6 +395,13 @@ class Gym:
     _rooms: Dict[str, int]
     _schedule: Dict[datetime,
                     Dict[str, Tuple[Instructor, WorkoutClass, List[str]]]]
+    _openings: Dict[datetime, Dict[str, List[Tuple[int, str]]]]
+    _registered: Dict[datetime, Set[str]]
+    _owned: Set[datetime]
+    _parent: Optional[Gym]
+    _forks: WeakSet
+    _changed: Set[datetime]
+    _metrics: Optional[GymMetrics]
 
     def __init__(self, gym_name: str) -> None:
         """Initialize a new Gym with <name> that has no instructors, workout
@@ -218,6 +416,13 @@ class Gym:
         self._workouts = {}
         self._rooms = {}
         self._schedule = {}
+        self._openings = {}
+        self._registered = {}
+        self._owned = set()
+        self._parent = None
+        self._forks = WeakSet()
+        self._changed = set()
+        self._metrics = None
 
     def add_instructor(self, instructor: Instructor) -> bool:
         """Add a new <instructor> to this Gym's roster iff the <instructor>
@@ -309,31 +514,26 @@ class Gym:
         boot_camp.get_name(), diane.get_id())
         True
         """
-        if time_point not in self._schedule:
-            self._schedule[time_point] = {}
-        if self._schedule[time_point] != {}:
-            if room_name in self._schedule[time_point]:
-                return False
-        self._schedule[time_point][room_name] = (
-            self._instructors[instr_id], self._workouts[workout_name], [])
-        if not self._instructors[instr_id].can_teach \
-                    (self._workouts[workout_name]):
+        offerings = self._schedule.get(time_point, {})
+        if room_name in offerings:
+            self._reject('schedule_workout_class', 'room_booked')
             return False
-        unique = 0
-        for tp in self._schedule:
-            if room_name in self._schedule[tp]:
-                unique += 1
-        if unique > 1:
+        instructor = self._instructors[instr_id]
+        workout_class = self._workouts[workout_name]
+        if not instructor.can_teach(workout_class):
+            self._reject('schedule_workout_class', 'unqualified')
             return False
-        unique = 0
-        for tp in self._schedule:
-            for r in self._schedule[tp]:
-                if self._instructors[instr_id] in self._schedule[tp][r]:
-                    unique += 1
-        if unique > 1:
-            return False
-        else:
-            return True
+        for offering in offerings.values():
+            if offering[0] is instructor:
+                self._reject('schedule_workout_class', 'instructor_conflict')
+                return False
+        self._own_bucket(time_point)
+        self._schedule[time_point][room_name] = (instructor, workout_class, [])
+        if workout_name not in self._openings[time_point]:
+            self._openings[time_point][workout_name] = []
+        heapq.heappush(self._openings[time_point][workout_name],
+                       (-self._rooms[room_name], room_name))
+        return True
 
     def register(self, time_point: datetime, client: str, workout_name: str) \
             -> bool:
@@ -343,8 +543,9 @@ class Gym:
         is not full.
 
         If the WorkoutClass is being offered in more than one room at
-        <time_point>, then the client is added to any one of the rooms (i.e.,
-        the room chosen does not matter).
+        <time_point>, then the client is added to exactly one of them: the room
+        with the most remaining capacity, so that registrations are spread
+        evenly across the rooms. Choosing the room takes O(log rooms) time.
 
         Return True iff the client was added.
 
@@ -370,21 +571,96 @@ class Gym:
         True
         >>> ac.register(sep_9_2019_12_00, 'Philip', 'Boot Camp')
         False
+        >>> ac.add_room('Gym', 1)
+        True
+        >>> ac.add_room('Pool', 1)
+        True
+        >>> david = Instructor(2, 'David')
+        >>> david.add_certificate('Cardio 1')
+        True
+        >>> ac.add_instructor(david)
+        True
+        >>> misha = Instructor(3, 'Misha')
+        >>> misha.add_certificate('Cardio 1')
+        True
+        >>> ac.add_instructor(misha)
+        True
+        >>> sep_9_2019_13_00 = datetime(2019, 9, 9, 13, 0)
+        >>> ac.schedule_workout_class(sep_9_2019_13_00, 'Gym', 'Boot Camp', 2)
+        True
+        >>> ac.schedule_workout_class(sep_9_2019_13_00, 'Pool', 'Boot Camp', 3)
+        True
+        >>> ac.register(sep_9_2019_13_00, 'Philip', 'Boot Camp')
+        True
+        >>> ac.register(sep_9_2019_13_00, 'Sophia', 'Boot Camp')
+        True
+        >>> ac.register(sep_9_2019_13_00, 'Mario', 'Boot Camp')
+        False
         """
-        if time_point not in self._schedule:
-            self._schedule[time_point] = {}
-        for r in self._schedule[time_point]:
-            if client in self._schedule[time_point][r][2]:
-                return False
-        for r in self._schedule[time_point]:
-            if self._workouts[workout_name] in self._schedule[time_point][r] \
-                    and len(self._schedule[time_point][r][2]) < self._rooms[r]:
-                self._schedule[time_point][r][2].append(client)
-        if self._schedule[time_point][r][2] != []:
-            return True
-        else:
+        if client in self._registered.get(time_point, ()):
+            self._reject('register', 'already_registered')
+            return False
+        openings = self._openings.get(time_point, {}).get(workout_name)
+        if not openings:
+            self._reject('register', 'not_offered')
             return False
+        if openings[0][0] == 0:
+            self._reject('register', 'full')
+            return False
+        self._own_bucket(time_point)
+        openings = self._openings[time_point][workout_name]
+        remaining, room = openings[0]
+        self._schedule[time_point][room][2].append(client)
+        self._registered[time_point].add(client)
+        heapq.heapreplace(openings, (remaining + 1, room))
+        return True
+
+    def cancel_workout_class(self, time_point: datetime, room_name: str) \
+            -> bool:
+        """Remove the offering in the room with <room_name> at <time_point>,
+        along with all of its registered clients, iff there is one.
 
+        Return True iff the offering was removed.
+
+        >>> ac = Gym('Athletic Centre')
+        >>> diane = Instructor(1, 'Diane')
+        >>> diane.add_certificate('Cardio 1')
+        True
+        >>> ac.add_instructor(diane)
+        True
+        >>> ac.add_room('Dance Studio', 50)
+        True
+        >>> boot_camp = WorkoutClass('Boot Camp', ['Cardio 1'])
+        >>> ac.add_workout_class(boot_camp)
+        True
+        >>> t1 = datetime(2019, 9, 9, 12, 0)
+        >>> ac.schedule_workout_class(t1, 'Dance Studio', 'Boot Camp', 1)
+        True
+        >>> ac.cancel_workout_class(t1, 'Dance Studio')
+        True
+        >>> ac.offerings_at(t1)
+        []
+        >>> ac.cancel_workout_class(t1, 'Dance Studio')
+        False
+        """
+        if room_name not in self._schedule.get(time_point, {}):
+            return False
+        self._own_bucket(time_point)
+        offering = self._schedule[time_point].pop(room_name)
+        workout_name = offering[1].get_name()
+        self._registered[time_point].difference_update(offering[2])
+        openings = self._openings[time_point]
+        openings[workout_name] = [o for o in openings[workout_name]
+                                  if o[1] != room_name]
+        heapq.heapify(openings[workout_name])
+        if not openings[workout_name]:
+            del openings[workout_name]
+        if not self._schedule[time_point]:
+            del self._schedule[time_point]
+            del self._openings[time_point]
+            del self._registered[time_point]
+            self._owned.discard(time_point)
+        return True
 
     def offerings_at(self, time_point: datetime) -> List[Tuple[str, str, str]]:
         """Return all the offerings that start at <time_point>.
@@ -414,12 +690,8 @@ class Gym:
         True
         """
         offering = []
-        if time_point not in self._schedule:
-            self._schedule[time_point] = {}
-        for r in self._schedule[time_point]:
-            offering.append(tuple([self._schedule[time_point][r][0].name,
-                                   self._schedule[time_point][r][1].get_name(),
-                                   r]))
+        for r, o in self._schedule.get(time_point, {}).items():
+            offering.append(tuple([o[0].name, o[1].get_name(), r]))
         return offering
 
 
@@ -510,17 +782,311 @@ class Gym:
         >>> ac.payroll(t1, t2, 25.0)
         [(1, 'Diane', 1, 26.5), (2, 'David', 0, 0.0)]
         """
+        # Call the method itself rather than its timed version, if metrics are
+        # enabled, so that only the calls made from outside are counted.
+        hours = Gym.instructor_hours(self, time1, time2)
         pay_roll = []
         for inst in self._instructors:
             pay_roll.append((inst,
                              self._instructors[inst].name,
-                             self.instructor_hours(time1, time2)[inst],
+                             hours[inst],
                              (base_rate +
                               (BONUS_RATE *
                                self._instructors[inst].get_num_certificates()))
-                             * self.instructor_hours(time1, time2)[inst]))
+                             * hours[inst]))
         return pay_roll
 
+    def payroll_periods(self, boundaries: List[datetime], base_rate: float) \
+            -> Iterator[Tuple[datetime, datetime,
+                              List[Tuple[int, str, int, float]]]]:
+        """Yield the payroll of every period between consecutive <boundaries>,
+        in time order.
+
+        The i-th period starts at boundaries[i] (inclusive) and ends at
+        boundaries[i + 1] (exclusive), so an hour on a boundary is only paid in
+        the period that it starts. For each period, yield a 3-element tuple
+        containing the start of the period, the end of the period, and a list
+        in the same format as the one returned by payroll for that period.
+
+        The schedule is only walked once, in time order, and each period is
+        yielded as soon as it is complete, so the payroll for many periods can
+        be written out (see write_payroll) without building all of it in
+        memory.
+
+        Preconditions:
+            - boundaries is sorted in strictly increasing order.
+            - len(boundaries) >= 2
+            - This Gym is not modified while the periods are being yielded.
+
+        >>> ac = Gym('Athletic Centre')
+        >>> diane = Instructor(1, 'Diane')
+        >>> david = Instructor(2, 'David')
+        >>> diane.add_certificate('Cardio 1')
+        True
+        >>> ac.add_instructor(diane)
+        True
+        >>> ac.add_instructor(david)
+        True
+        >>> ac.add_room('Dance Studio', 50)
+        True
+        >>> boot_camp = WorkoutClass('Boot Camp', ['Cardio 1'])
+        >>> ac.add_workout_class(boot_camp)
+        True
+        >>> t1 = datetime(2019, 9, 9, 12, 0)
+        >>> ac.schedule_workout_class(t1, 'Dance Studio', boot_camp.get_name(),
+        ... 1)
+        True
+        >>> t2 = datetime(2019, 9, 10, 12, 0)
+        >>> t3 = datetime(2019, 9, 11, 12, 0)
+        >>> periods = ac.payroll_periods([t1, t2, t3], 25.0)
+        >>> next(periods)[2]
+        [(1, 'Diane', 1, 26.5), (2, 'David', 0, 0.0)]
+        >>> next(periods)[2]
+        [(1, 'Diane', 0, 0.0), (2, 'David', 0, 0.0)]
+        """
+        ids = sorted(self._instructors)
+        rates = {}
+        for instr_id in ids:
+            certificates = self._instructors[instr_id].get_num_certificates()
+            rates[instr_id] = base_rate + BONUS_RATE * certificates
+        times = sorted(tp for tp in self._schedule
+                       if boundaries[0] <= tp < boundaries[-1])
+
+        i = 0
+        for period in range(len(boundaries) - 1):
+            end = boundaries[period + 1]
+            hours = dict.fromkeys(ids, 0)
+            while i < len(times) and times[i] < end:
+                for offering in self._schedule[times[i]].values():
+                    hours[offering[0].get_id()] += 1
+                i += 1
+            yield (boundaries[period], end,
+                   [(instr_id, self._instructors[instr_id].name,
+                     hours[instr_id], rates[instr_id] * hours[instr_id])
+                    for instr_id in ids])
+
+    def enable_metrics(self, metrics: Optional[GymMetrics] = None) \
+            -> GymMetrics:
+        """Start recording the call counts, latencies and rejection reasons of
+        the operations in INSTRUMENTED_OPERATIONS in <metrics>, or in a new
+        GymMetrics if <metrics> is None. Return the GymMetrics used.
+
+        While metrics are disabled, which is the default, the operations are
+        not wrapped at all and only pay for a single check when they reject
+        something.
+
+        >>> ac = Gym('Athletic Centre')
+        >>> metrics = ac.enable_metrics()
+        >>> ac.offerings_at(datetime(2019, 9, 9, 12, 0))
+        []
+        >>> metrics.snapshot()['calls']
+        {'offerings_at': 1}
+        >>> ac.offerings_at(time_point=datetime(2019, 9, 9, 12, 0))
+        []
+        >>> ac.payroll(datetime(2019, 9, 1), datetime(2019, 9, 30), 25.0)
+        []
+        >>> metrics.snapshot()['calls']
+        {'offerings_at': 2, 'payroll': 1}
+        >>> ac.disable_metrics()
+        >>> ac.offerings_at(datetime(2019, 9, 9, 12, 0))
+        []
+        >>> metrics.snapshot()['calls']
+        {'offerings_at': 2, 'payroll': 1}
+        """
+        self.disable_metrics()
+        if metrics is None:
+            metrics = GymMetrics()
+        self._metrics = metrics
+        for operation in INSTRUMENTED_OPERATIONS:
+            # Shadow the method with a timed version on this Gym only.
+            setattr(self, operation,
+                    _timed(metrics, operation, getattr(self, operation)))
+        return metrics
+
+    def disable_metrics(self) -> None:
+        """Stop recording the operations of this Gym, if they were being
+        recorded.
+        """
+        for operation in INSTRUMENTED_OPERATIONS:
+            self.__dict__.pop(operation, None)
+        self._metrics = None
+
+    def _reject(self, operation: str, reason: str) -> None:
+        """Record that <operation> returned False because of <reason>, iff the
+        metrics of this Gym are enabled.
+        """
+        if self._metrics is not None:
+            self._metrics.reject(operation, reason)
+
+    def fork(self) -> Gym:
+        """Return a copy of this Gym that can be modified without affecting
+        this Gym, and vice versa.
+
+        The copy shares the offerings at every date and time with this Gym
+        until either of them modifies the offerings at that date and time, so
+        forking takes time proportional to the number of dates and times with
+        offerings rather than to the number of offerings and registrations.
+        The instructors and workout classes themselves are shared.
+
+        >>> ac = Gym('Athletic Centre')
+        >>> diane = Instructor(1, 'Diane')
+        >>> diane.add_certificate('Cardio 1')
+        True
+        >>> ac.add_instructor(diane)
+        True
+        >>> ac.add_room('Dance Studio', 50)
+        True
+        >>> boot_camp = WorkoutClass('Boot Camp', ['Cardio 1'])
+        >>> ac.add_workout_class(boot_camp)
+        True
+        >>> t1 = datetime(2019, 9, 9, 12, 0)
+        >>> ac.schedule_workout_class(t1, 'Dance Studio', 'Boot Camp', 1)
+        True
+        >>> what_if = ac.fork()
+        >>> what_if.register(t1, 'Philip', 'Boot Camp')
+        True
+        >>> ac.register(t1, 'Philip', 'Boot Camp')
+        True
+        >>> ac.register(t1, 'Sophia', 'Boot Camp')
+        True
+        >>> what_if.cancel_workout_class(t1, 'Dance Studio')
+        True
+        >>> ac.offerings_at(t1)
+        [('Diane', 'Boot Camp', 'Dance Studio')]
+        """
+        fork = Gym(self.name)
+        fork._instructors = dict(self._instructors)
+        fork._workouts = dict(self._workouts)
+        fork._rooms = dict(self._rooms)
+        fork._schedule = dict(self._schedule)
+        fork._openings = dict(self._openings)
+        fork._registered = dict(self._registered)
+        fork._parent = self
+        self._forks.add(fork)
+        # Every bucket is now shared with the fork.
+        self._owned = set()
+        return fork
+
+    def diff(self) -> Dict[datetime,
+                           Dict[str, Tuple[Optional[Tuple[int, str, int]],
+                                           Optional[Tuple[int, str, int]]]]]:
+        """Return the differences between the offerings of this Gym and those
+        of the Gym it was forked from.
+
+        Each key is a date and time at which the offerings differ and its value
+        is a nested dictionary. Each key in the nested dictionary is the name of
+        a room whose offering differs at that date and time, and its value is a
+        tuple of the offering in the Gym this Gym was forked from and the
+        offering in this Gym, in that order. Each offering is described by a
+        tuple of the instructor's ID, the workout class's name and the number of
+        registered clients, or is None if there is no offering in that room.
+
+        Only the dates and times that either Gym has modified since the fork
+        are compared, so this takes time proportional to the number of them
+        rather than to the number of dates and times with offerings.
+
+        Precondition: this Gym was created by calling fork.
+
+        >>> ac = Gym('Athletic Centre')
+        >>> diane = Instructor(1, 'Diane')
+        >>> diane.add_certificate('Cardio 1')
+        True
+        >>> ac.add_instructor(diane)
+        True
+        >>> ac.add_room('Dance Studio', 50)
+        True
+        >>> boot_camp = WorkoutClass('Boot Camp', ['Cardio 1'])
+        >>> ac.add_workout_class(boot_camp)
+        True
+        >>> t1 = datetime(2019, 9, 9, 12, 0)
+        >>> ac.schedule_workout_class(t1, 'Dance Studio', 'Boot Camp', 1)
+        True
+        >>> what_if = ac.fork()
+        >>> what_if.register(t1, 'Philip', 'Boot Camp')
+        True
+        >>> what_if.diff() == {t1: {'Dance Studio': ((1, 'Boot Camp', 0),
+        ...                                          (1, 'Boot Camp', 1))}}
+        True
+        """
+        changes = {}
+        parent = self._parent._schedule
+        for tp in self._changed:
+            mine = self._schedule.get(tp, {})
+            theirs = parent.get(tp, {})
+            if mine is theirs:
+                continue
+            rooms = {}
+            for room in set(mine).union(theirs):
+                before = _describe_offering(theirs.get(room))
+                after = _describe_offering(mine.get(room))
+                if before != after:
+                    rooms[room] = (before, after)
+            if rooms:
+                changes[tp] = rooms
+        return changes
+
+    def _own_bucket(self, time_point: datetime) -> None:
+        """Make sure the offerings at <time_point> belong to this Gym alone,
+        so that they can be modified without affecting any other Gym. If there
+        are no offerings at <time_point>, start an empty set of offerings.
+        """
+        if time_point in self._owned:
+            return
+        # The first modification at <time_point> since this Gym last forked
+        # or was forked always gets here, so it is recorded for diff.
+        self._changed.add(time_point)
+        for fork in self._forks:
+            fork._changed.add(time_point)
+        if time_point in self._schedule:
+            offerings = {}
+            for room, offering in self._schedule[time_point].items():
+                offerings[room] = (offering[0], offering[1], offering[2][:])
+            self._schedule[time_point] = offerings
+            openings = {}
+            for workout_name, heap in self._openings[time_point].items():
+                openings[workout_name] = heap[:]
+            self._openings[time_point] = openings
+            self._registered[time_point] = set(self._registered[time_point])
+        else:
+            self._schedule[time_point] = {}
+            self._openings[time_point] = {}
+            self._registered[time_point] = set()
+        self._owned.add(time_point)
+
+
+def _describe_offering(
+        offering: Optional[Tuple[Instructor, WorkoutClass, List[str]]]) \
+        -> Optional[Tuple[int, str, int]]:
+    """Return a tuple of the instructor's ID, the workout class's name and the
+    number of registered clients of <offering>, or None if <offering> is None.
+    """
+    if offering is None:
+        return None
+    return offering[0].get_id(), offering[1].get_name(), len(offering[2])
+
+
+def write_payroll(file: TextIO,
+                  periods: Iterable[Tuple[datetime, datetime,
+                                          List[Tuple[int, str, int, float]]]]) \
+        -> None:
+    """Write the payroll <periods>, as yielded by Gym.payroll_periods, to
+    <file> in CSV format.
+
+    Each row contains the start and end of a period, the instructor's ID, the
+    instructor's name, the hours they worked and their wages in that period.
+    Rows are written as the periods are produced, so <periods> is never held in
+    memory all at once.
+
+    Precondition: <file> is open for writing.
+    """
+    writer = csv.writer(file)
+    writer.writerow(['start', 'end', 'id', 'name', 'hours', 'wages'])
+    for start, end, table in periods:
+        for instr_id, name, hours, wages in table:
+            writer.writerow([start.strftime('%Y-%m-%d %H:%M'),
+                             end.strftime('%Y-%m-%d %H:%M'),
+                             instr_id, name, hours, wages])
+
 
 def parse_instructor(file: TextIO, header: str) -> Instructor:
     """Return a new Instructor based on the data found in the file and the
@@ -635,12 +1201,20 @@ def parse_registrations(file: TextIO, header: str) -> \
     return when, registrations
 
 
-def load_data(file_name: str, gym_name: str) -> Gym:
+def load_data(file_name: str, gym_name: str,
+              metrics: Optional[GymMetrics] = None) -> Gym:
     """Return a new Gym based on the contents of the file being read.
 
+    If <metrics> is not None, the new Gym records its operations in <metrics>
+    (see Gym.enable_metrics), and the time taken to load the whole file is
+    recorded as a call to 'load_data'.
+
     Precondition: Assumes that the file <file_name> exists and can be read.
     """
+    start = time.perf_counter()
     new_gym = Gym(gym_name)
+    if metrics is not None:
+        new_gym.enable_metrics(metrics)
 
     with open(file_name, 'r') as f:
         line = f.readline().strip()
@@ -671,15 +1245,19 @@ def load_data(file_name: str, gym_name: str) -> Gym:
 
             line = f.readline().strip()
 
+    if metrics is not None:
+        metrics.record('load_data', time.perf_counter() - start)
     return new_gym
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
-        'allowed-io': ['load_data'],
+        'allowed-io': ['load_data', 'write_payroll'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'datetime'],
+                                   'datetime', 'csv', 'heapq',
+                                   '__future__', 'bisect', 'time',
+                                   'weakref'],
         'max-attributes': 15,
     })
 
@@ -0,0 +1,184 @@
+"""
+Assignment 0 workload generator
+CSC148, Winter 2020
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+=== Module Description ===
+
+This file contains a seeded generator of synthetic gyms. The same seed and
+scale always produce the same gym, which can be written out in the format read
+by gym.load_data or loaded directly into a Gym.
+"""
+from __future__ import annotations
+import random
+from datetime import datetime, timedelta
+from typing import List, TextIO, Tuple
+
+from gym import Gym, Instructor, WorkoutClass
+
+
+# The date and time of the first hour at which offerings are generated.
+FIRST_HOUR = datetime(2020, 1, 6, 9, 0)
+
+
+class GymWorkload:
+    """A synthetic gym: its instructors, workout classes and rooms, and the
+    offerings and registrations at each hour.
+
+    === Public Attributes ===
+    instructors: The ID, name and certificates of each instructor.
+    workout_classes: The name and required certificates of each workout class.
+    rooms: The name and capacity of each room.
+    offerings: For each hour with offerings, in time order, the date and time
+        and the offerings that start then. Each offering is a tuple of the
+        instructor's ID, the workout class's name and the room's name.
+    registrations: For each hour with offerings, in time order, the date and
+        time and the registrations for the offerings that start then. Each
+        registration is a tuple of the client's name and the workout class's
+        name.
+
+    === Representation Invariants ===
+    - Every room name is a single word.
+    - No name contains a comma, and no workout class name contains 'Class'.
+    - Every offering's instructor is qualified to teach its workout class.
+    """
+    instructors: List[Tuple[int, str, List[str]]]
+    workout_classes: List[Tuple[str, List[str]]]
+    rooms: List[Tuple[str, int]]
+    offerings: List[Tuple[datetime, List[Tuple[int, str, str]]]]
+    registrations: List[Tuple[datetime, List[Tuple[str, str]]]]
+
+    def __init__(self) -> None:
+        """Initialize an empty GymWorkload."""
+        self.instructors = []
+        self.workout_classes = []
+        self.rooms = []
+        self.offerings = []
+        self.registrations = []
+
+    def write(self, file: TextIO) -> None:
+        """Write this workload to <file> in the format read by gym.load_data.
+
+        Precondition: <file> is open for writing.
+        """
+        for instr_id, name, certificates in self.instructors:
+            file.write('Instructor {0} {1}\n'.format(instr_id, name))
+            for certificate in certificates:
+                file.write(certificate + '\n')
+            file.write('\n')
+        for name, certificates in self.workout_classes:
+            file.write('Class {0}\n'.format(name))
+            for certificate in certificates:
+                file.write(certificate + '\n')
+            file.write('\n')
+        for name, capacity in self.rooms:
+            file.write('Room {0}\n{0} Room\n{1}\n\n'.format(name, capacity))
+        for when, offerings in self.offerings:
+            file.write('Offerings {0}\n'.format(
+                when.strftime('%Y-%m-%d %H:%M')))
+            for instr_id, workout_name, room_name in offerings:
+                file.write('{0}, {1}, {2}\n'.format(instr_id, workout_name,
+                                                    room_name))
+            file.write('\n')
+        for when, registrations in self.registrations:
+            file.write('Registrations {0}\n'.format(
+                when.strftime('%Y-%m-%d %H:%M')))
+            for client, workout_name in registrations:
+                file.write('{0}, {1}\n'.format(client, workout_name))
+            file.write('\n')
+
+    def empty_gym(self, gym_name: str) -> Gym:
+        """Return a new Gym called <gym_name> with the instructors, workout
+        classes and rooms of this workload, but no offerings.
+        """
+        gym = Gym(gym_name)
+        for instr_id, name, certificates in self.instructors:
+            instructor = Instructor(instr_id, name)
+            for certificate in certificates:
+                instructor.add_certificate(certificate)
+            gym.add_instructor(instructor)
+        for name, certificates in self.workout_classes:
+            gym.add_workout_class(WorkoutClass(name, certificates))
+        for name, capacity in self.rooms:
+            gym.add_room(name, capacity)
+        return gym
+
+
+def generate_workload(seed: int, num_instructors: int = 20,
+                      num_rooms: int = 5, num_classes: int = 10,
+                      num_weeks: int = 4, clients_per_slot: int = 20,
+                      hours_per_day: int = 4) -> GymWorkload:
+    """Return a synthetic GymWorkload generated from <seed>.
+
+    Offerings start every hour for <hours_per_day> hours a day, 7 days a week,
+    for <num_weeks> weeks, starting at FIRST_HOUR. At each of those hours every
+    room hosts an offering taught by a qualified instructor who is free then,
+    if there is one, and <clients_per_slot> clients register for the workout
+    classes offered.
+
+    Preconditions:
+        - num_instructors > 0, num_rooms > 0 and num_classes > 0
+        - num_weeks >= 0, clients_per_slot >= 0 and 0 <= hours_per_day <= 24
+
+    >>> generate_workload(148).rooms == generate_workload(148).rooms
+    True
+    """
+    rng = random.Random(seed)
+    workload = GymWorkload()
+    certificates = ['Certificate {0}'.format(i)
+                    for i in range(max(2, num_classes // 2))]
+
+    for i in range(num_classes):
+        required = rng.sample(certificates, rng.randint(0, 2))
+        workload.workout_classes.append(('Workout {0}'.format(i), required))
+    for i in range(num_instructors):
+        held = rng.sample(certificates, rng.randint(1, len(certificates)))
+        workload.instructors.append((i + 1, 'Instructor {0}'.format(i), held))
+    for i in range(num_rooms):
+        workload.rooms.append(('Room{0}'.format(i), rng.randint(10, 50)))
+
+    # The workout classes that each instructor can teach.
+    teachable = {}
+    for instr_id, _, held in workload.instructors:
+        teachable[instr_id] = [name for name, required
+                               in workload.workout_classes
+                               if all(c in held for c in required)]
+
+    clients = ['Client {0}'.format(i) for i in range(clients_per_slot)]
+    for day in range(7 * num_weeks):
+        for hour in range(hours_per_day):
+            when = FIRST_HOUR + timedelta(days=day, hours=hour)
+            free = [instr_id for instr_id, _, _ in workload.instructors
+                    if teachable[instr_id]]
+            rng.shuffle(free)
+            offerings = []
+            for room_name, _ in workload.rooms:
+                if not free:
+                    break
+                instr_id = free.pop()
+                offerings.append((instr_id, rng.choice(teachable[instr_id]),
+                                  room_name))
+            if not offerings:
+                continue
+            workload.offerings.append((when, offerings))
+            workload.registrations.append(
+                (when, [(client, rng.choice(offerings)[1])
+                        for client in clients]))
+    return workload
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'datetime', 'random', '__future__', 'gym'],
+        'max-args': 7,
+    })
+
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,222 @@
+"""CSC148 Assignment 1
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+=== Module Description ===
+
+This file contains benchmarks for surveys, courses and groupers, run on
+synthetic courses generated from a seed so that results can be reproduced.
+
+Run it with, for example:
+
+    python benchmark.py memory --students 50000 --questions 40
+    python benchmark.py grouping --grouper lazy-greedy --students 2000
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from course import Course, Student
+from grouper import EXECUTORS, ClusterGrouper, GreedyGrouper, Grouper, \
+    LocalSearchGrouper, OptimalGrouper, PairMatchingGrouper, WindowGrouper
+from survey import Answer, CheckboxQuestion, MultipleChoiceQuestion, \
+    NumericQuestion, Question, Survey, YesNoQuestion
+
+
+def random_questions(num_questions: int, rng: random.Random) \
+        -> List[Question]:
+    """
+    Return <num_questions> questions of every kind, in turn, with random
+    options and ranges chosen using <rng>.
+    """
+    questions = []
+    for i in range(num_questions):
+        kind = i % 4
+        if kind == 0:
+            options = ['option {0}'.format(j)
+                       for j in range(rng.randint(2, 6))]
+            questions.append(MultipleChoiceQuestion(i, 'Q{0}'.format(i),
+                                                    options))
+        elif kind == 1:
+            low = rng.randint(-5, 5)
+            questions.append(NumericQuestion(i, 'Q{0}'.format(i), low,
+                                             low + rng.randint(1, 10)))
+        elif kind == 2:
+            questions.append(YesNoQuestion(i, 'Q{0}'.format(i)))
+        else:
+            options = ['option {0}'.format(j)
+                       for j in range(rng.randint(2, 8))]
+            questions.append(CheckboxQuestion(i, 'Q{0}'.format(i), options))
+    return questions
+
+
+def random_answer(question: Question, rng: random.Random) -> Answer:
+    """
+    Return a random valid answer to <question>, chosen using <rng>.
+    """
+    if isinstance(question, CheckboxQuestion):
+        options = question.get_options()
+        return Answer(rng.sample(options, rng.randint(1, len(options))))
+    elif isinstance(question, MultipleChoiceQuestion):
+        return Answer(rng.choice(question.get_options()))
+    elif isinstance(question, NumericQuestion):
+        return Answer(rng.randint(question.get_min(), question.get_max()))
+    return Answer(rng.random() < 0.5)
+
+
+def random_course(num_students: int, questions: List[Question],
+                  rng: random.Random) -> Course:
+    """
+    Return a course with <num_students> students, each of whom has a random
+    valid answer to every question in <questions>, chosen using <rng>.
+    """
+    students = []
+    for i in range(num_students):
+        student = Student(i, 'Student {0}'.format(i))
+        for question in questions:
+            student.set_answer(question, random_answer(question, rng))
+        students.append(student)
+    course = Course('Benchmark')
+    course.enroll_students(students)
+    return course
+
+
+def measure_answer_memory(num_students: int, num_questions: int,
+                          seed: int) -> Dict[str, Any]:
+    """
+    Return the memory, in bytes, used by the answers of <num_students>
+    students to <num_questions> questions when each student keeps their own
+    dictionary of Answer objects, and after the answers are moved into a
+    survey's AnswerStore.
+    """
+    rng = random.Random(seed)
+    questions = random_questions(num_questions, rng)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    students = [Student(i, 'Student {0}'.format(i))
+                for i in range(num_students)]
+    without_answers = tracemalloc.get_traced_memory()[0]
+    for student in students:
+        for question in questions:
+            student.set_answer(question, random_answer(question, rng))
+    gc.collect()
+    with_dicts = tracemalloc.get_traced_memory()[0]
+    Survey(questions).store_answers(students)
+    gc.collect()
+    with_store = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {'students': num_students, 'questions': num_questions,
+            'student_bytes': without_answers - baseline,
+            'answer_dict_bytes': with_dicts - without_answers,
+            'answer_store_bytes': with_store - without_answers}
+
+
+# The groupers that the grouping benchmark can time, by name. Each one is
+# called with the group size, which PairMatchingGrouper ignores since it always
+# makes pairs.
+GROUPERS: Dict[str, Callable[[int], Grouper]] = {
+    'greedy': GreedyGrouper,
+    'lazy-greedy': lambda size: GreedyGrouper(size, lazy=True),
+    'window': WindowGrouper,
+    'cluster': ClusterGrouper,
+    'optimal': OptimalGrouper,
+    'pair-matching': lambda size: PairMatchingGrouper(),
+    'sparse-pair-matching': lambda size: PairMatchingGrouper(neighbours=16),
+    'local-search': lambda size: LocalSearchGrouper(
+        size, start=WindowGrouper(size), budget=10.0, seed=148),
+    'annealing': lambda size: LocalSearchGrouper(
+        size, start=WindowGrouper(size), budget=10.0, temperature=0.01,
+        seed=148),
+}
+
+
+def make_grouper(name: str, group_size: int, executor: str,
+                 workers: Optional[int]) -> Grouper:
+    """
+    Return the grouper called <name> in GROUPERS, which creates groups of size
+    <group_size> and scores them on an executor of kind <executor> with
+    <workers> threads or processes.
+    """
+    grouper = GROUPERS[name](group_size)
+    grouper.executor = executor
+    grouper.workers = workers
+    return grouper
+
+
+def time_grouping(grouper: Grouper, num_students: int, num_questions: int,
+                  seed: int) -> Dict[str, Any]:
+    """
+    Return the time, in seconds, that <grouper> takes to group a random
+    course of <num_students> students who answered <num_questions> questions,
+    along with the score of the grouping it makes, the hits and misses of the
+    survey's score cache, the history of that score if <grouper> is a
+    LocalSearchGrouper, and the optimality gap if <grouper> is an
+    OptimalGrouper.
+    """
+    rng = random.Random(seed)
+    questions = random_questions(num_questions, rng)
+    course = random_course(num_students, questions, rng)
+    survey = Survey(questions)
+    start = time.perf_counter()
+    grouping = grouper.make_grouping(course, survey)
+    seconds = time.perf_counter() - start
+    results = {'students': num_students, 'questions': num_questions,
+               'grouper': type(grouper).__name__,
+               'group_size': grouper.group_size, 'seconds': seconds,
+               'groups': len(grouping),
+               'score': survey.score_grouping(grouping),
+               'cache': survey.cache_info()}
+    if isinstance(grouper, LocalSearchGrouper):
+        results['history'] = grouper.history
+    if isinstance(grouper, OptimalGrouper):
+        results['optimality_gap'] = grouper.optimality_gap
+    return results
+
+
+# The benchmarks that can be run from the command line. Each one is called with
+# the parsed command line arguments and returns its results.
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], Dict[str, Any]]] = {
+    'memory': lambda args: measure_answer_memory(args.students,
+                                                 args.questions, args.seed),
+    'grouping': lambda args: time_grouping(
+        make_grouper(args.grouper, args.group_size, args.executor,
+                     args.workers),
+        args.students, args.questions, args.seed),
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark assignment 1.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=148)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--questions', type=int, default=40)
+    parser.add_argument('--grouper', choices=sorted(GROUPERS),
+                        default='greedy')
+    parser.add_argument('--group-size', type=int, default=4)
+    parser.add_argument('--executor', choices=EXECUTORS, default='serial')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None,
+                        help='a file to write the results to as JSON')
+    arguments = parser.parse_args()
+
+    results = BENCHMARKS[arguments.benchmark](arguments)
+    for name, value in results.items():
+        print('{0:<24}{1}'.format(name, value))
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as out:
+            json.dump(results, out, indent=2, sort_keys=True)
@@ -23,12 +23,20 @@ This file contains classes that describe a university course and the students
 who are enrolled in these courses.
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Tuple, Optional
+import heapq
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Optional
+from weakref import WeakSet
 
 if TYPE_CHECKING:
     from survey import Answer, Survey, Question
 
 
+# The most students that Course.enroll_students inserts in order one at a
+# time; more are merged with the enrolled students in a single pass instead.
+BISECT_LIMIT = 64
+
+
 def sort_students(lst: List[Student], attribute: str) -> List[Student]:
     """
     Return a shallow copy of <lst> sorted by <attribute>
@@ -54,19 +62,57 @@ class Student:
     === Public Attributes ===
     id: the id of the student
     name: the name of the student
+    answer_version: the number of times this student's answers have changed
+
+    === Private Attributes ===
+    _answers: a dictionary mapping the id of each question this student
+        answered to their answer
+    _valid: a dictionary mapping the id of each question this student answered
+        to True iff their answer was valid for that question when it was
+        recorded
+    _questions: a dictionary mapping the id of each question this student
+        answered to the question their answer was validated against
+    _courses: the courses this student is enrolled in, which are told when
+        the validity of one of their answers changes. They are held weakly,
+        so that a course that is no longer used is not kept alive.
 
     === Representation Invariants ===
     name is not the empty string
+    _answers, _valid and _questions have the same keys
     """
     id: int
     name: str
+    answer_version: int
     _answers: dict
+    _valid: dict
+    _questions: Dict[int, Question]
+    _courses: WeakSet
 
     def __init__(self, id_: int, name: str) -> None:
         """ Initialize a student with name <name> and id <id>"""
         self.id = id_
         self.name = name
+        self.answer_version = 0
         self._answers = {}
+        self._valid = {}
+        self._questions = {}
+        self._courses = WeakSet()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Return the state of this student to pickle, without the courses they
+        are enrolled in, so that pickling a student does not pickle every
+        student in their courses too. A pickled Course enrolls its students
+        again when it is unpickled.
+        """
+        state = self.__dict__.copy()
+        del state['_courses']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """ Restore this student from <state>, enrolled in no courses """
+        self.__dict__.update(state)
+        self._courses = WeakSet()
 
     def __str__(self) -> str:
         """ Return the name of this student """
@@ -76,18 +122,45 @@ class Student:
         """
         Return True iff this student has an answer for a question with the same
         id as <question> and that answer is a valid answer for <question>.
+
+        The answer is not validated again if <question> is the question it was
+        validated against by set_answer, which recorded its validity. A
+        different question with the same id may accept different answers, so
+        the answer is validated against it instead.
+
+        >>> from survey import Answer, NumericQuestion
+        >>> student = Student(1, 'Misha')
+        >>> student.set_answer(NumericQuestion(1, 'Hours?', 0, 10), Answer(8))
+        >>> student.has_answer(NumericQuestion(1, 'Hours?', 0, 10))
+        True
+        >>> student.has_answer(NumericQuestion(1, 'Hours?', 0, 5))
+        False
         """
-        if question.id in self._answers:
-            answer = self._answers[question.id]
-            return question.validate_answer(answer)
-        else:
-            return False
+        if self._questions.get(question.id) is question:
+            return self._valid.get(question.id, False)
+        answer = self.get_answer(question)
+        return answer is not None and answer.is_valid(question)
 
     def set_answer(self, question: Question, answer: Answer) -> None:
         """
-        Record this student's answer <answer> to the question <question>.
+        Record this student's answer <answer> to the question <question>, and
+        whether it is a valid answer to <question>.
+
+        <question> may remember what makes <answer> quicker to compare (see
+        Question.ingest_answer).
         """
+        valid = question.ingest_answer(answer)
+        was_valid = self._valid.get(question.id, False)
+        was_asked = self._questions.get(question.id)
         self._answers[question.id] = answer
+        self._valid[question.id] = valid
+        self._questions[question.id] = question
+        self.answer_version += 1
+        if valid or was_valid:
+            change = int(valid) - int(was_valid)
+            if change != 0 or was_asked is not question:
+                for course in self._courses:
+                    course.count_answer(question, change)
 
     def get_answer(self, question: Question) -> Optional[Answer]:
         """
@@ -99,6 +172,120 @@ class Student:
         else:
             return None
 
+    def recorded_answers(self) -> List[Tuple[int, Answer, bool]]:
+        """
+        Return a list of (question id, answer, validity) tuples, one for each
+        answer recorded by this student.
+        """
+        return [(question_id, self._answers[question_id],
+                 self._valid.get(question_id, False))
+                for question_id in self._answers]
+
+    def valid_questions(self) -> List[Question]:
+        """
+        Return the questions this student has a valid answer to, as the
+        questions their answers were validated against.
+        """
+        return [self._questions[question_id] for question_id in self._answers
+                if self._valid.get(question_id, False)]
+
+    def use_answers(self, answers: Any, valid: Any) -> None:
+        """
+        Keep this student's answers in <answers>, and their validity in
+        <valid>, from now on instead of in dictionaries of their own.
+
+        === Precondition ===
+        <answers> supports the dictionary operations in, [], []= and iteration,
+            and <valid> supports get and []=, with question ids as keys. They
+            already hold this student's answers and their validity.
+        """
+        self._answers = answers
+        self._valid = valid
+        self.answer_version += 1
+
+    def add_course(self, course: Course) -> None:
+        """
+        Record that this student is enrolled in <course>, so that <course> is
+        told whenever the validity of one of their answers changes.
+        """
+        self._courses.add(course)
+
+    def drop_course(self, course: Course) -> None:
+        """
+        Record that this student is no longer enrolled in <course>, so that
+        <course> is not told about their answers any more.
+        """
+        self._courses.discard(course)
+
+
+class _StudentList(list):
+    """
+    A list of the students enrolled in a course, which records whether it was
+    changed by anything other than Course.enroll_students.
+
+    === Public Attributes ===
+    changed: True iff this list was changed since the course last updated its
+        index, order and answer counts from it
+    """
+
+    changed: bool
+
+    def __init__(self, students: Any = ()) -> None:
+        """ Initialize a list of <students> that has not been changed """
+        list.__init__(self, students)
+        self.changed = False
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        """ Set self[index] to <value>, and record the change """
+        list.__setitem__(self, index, value)
+        self.changed = True
+
+    def __delitem__(self, index: Any) -> None:
+        """ Delete self[index], and record the change """
+        list.__delitem__(self, index)
+        self.changed = True
+
+    def __iadd__(self, students: Any) -> _StudentList:
+        """ Extend this list by <students>, and record the change """
+        self.extend(students)
+        return self
+
+    def __imul__(self, times: int) -> _StudentList:
+        """ Repeat this list <times> times, and record the change """
+        list.__imul__(self, times)
+        self.changed = True
+        return self
+
+    def append(self, student: Student) -> None:
+        """ Add <student> to the end of this list, and record the change """
+        list.append(self, student)
+        self.changed = True
+
+    def extend(self, students: Any) -> None:
+        """ Add <students> to the end of this list, and record the change """
+        list.extend(self, students)
+        self.changed = True
+
+    def insert(self, index: int, student: Student) -> None:
+        """ Insert <student> before <index>, and record the change """
+        list.insert(self, index, student)
+        self.changed = True
+
+    def pop(self, index: int = -1) -> Student:
+        """ Remove and return self[index], and record the change """
+        self.changed = True
+        return list.pop(self, index)
+
+    def remove(self, student: Student) -> None:
+        """ Remove <student> from this list, and record the change """
+        list.remove(self, student)
+        self.changed = True
+
+    def clear(self) -> None:
+        """ Remove every student from this list, and record the change """
+        list.clear(self)
+        self.changed = True
+
 
 class Course:
     """
@@ -108,20 +295,61 @@ class Course:
     name: the name of the course
     students: a list of students enrolled in the course
 
+    === Private Attributes ===
+    _enrolled: the list of students that _index, _ids, _by_id and _answered
+        were last updated from; it is students unless students was assigned
+        another list since
+    _index: a dictionary mapping the id of each enrolled student to that
+        student
+    _ids: the ids of the enrolled students, from lowest to highest
+    _by_id: the enrolled students, in the same order as _ids
+    _view: _by_id as a tuple, or None if it has not been made since the last
+        enrolment
+    _answered: a dictionary mapping the id of each question to the number of
+        enrolled students who have a valid answer to it
+    _asked: a dictionary mapping the id of each question that enrolled
+        students have a valid answer to, to the question all of those answers
+        were validated against, or None if they were not all validated against
+        the same question
+
     === Representation Invariants ===
     - No two students in this course have the same id
     - name is not the empty string
+    - If students is _enrolled and it has not changed, then students,
+      _index, _ids and _by_id hold the same students
     """
 
     name: str
     students: List[Student]
+    _enrolled: _StudentList
+    _index: Dict[int, Student]
+    _ids: List[int]
+    _by_id: List[Student]
+    _view: Optional[Tuple[Student, ...]]
+    _answered: Dict[int, int]
+    _asked: Dict[int, Optional[Question]]
 
     def __init__(self, name: str) -> None:
         """
         Initialize a course with the name of <name>.
         """
         self.name = name
-        self.students = []
+        self.students = self._enrolled = _StudentList()
+        self._index = {}
+        self._ids = []
+        self._by_id = []
+        self._view = None
+        self._answered = {}
+        self._asked = {}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Restore this course from <state>, and enroll its students in it again
+        so that they tell it when their answers change.
+        """
+        self.__dict__.update(state)
+        for student in self._enrolled:
+            student.add_course(self)
 
     def enroll_students(self, students: List[Student]) -> None:
         """
@@ -129,28 +357,70 @@ class Course:
 
         If adding any student would violate a representation invariant,
         do not add any of the students in <students> to the course.
+
+        This takes O(len(<students>) log len(<students>)) time for the checks,
+        plus the time to put the new students in order of id among the
+        enrolled ones: a binary search and an insertion for each one when
+        there are at most BISECT_LIMIT of them, and a single merge otherwise.
         """
-        enrolled = {}
-        for student in self.students:
-            enrolled[student.id] = student.name
+        self._synchronize()
+        new_ids = set()
         for student in students:
-            if student.id in enrolled.keys() or student.name == '':
+            if student.id in self._index or student.id in new_ids \
+                    or student.name == '':
                 return None
-            else:
-                enrolled[student.id] = student.name
+            new_ids.add(student.id)
         for student in students:
-            self.students.append(student)
+            self._index[student.id] = student
+            self._count_answers(student)
+        self._enrolled.extend(students)
+        self._enrolled.changed = False
+        new = sorted(students, key=_student_id)
+        if len(new) <= BISECT_LIMIT:
+            for student in new:
+                i = bisect_left(self._ids, student.id)
+                self._ids.insert(i, student.id)
+                self._by_id.insert(i, student)
+        else:
+            self._by_id = list(heapq.merge(self._by_id, new, key=_student_id))
+            self._ids = [student.id for student in self._by_id]
+        self._view = None
         return None
 
+    def count_answer(self, question: Question, change: int) -> None:
+        """
+        Change the number of enrolled students who have a valid answer to the
+        question with the same id as <question> by <change>. Students call
+        this when the validity of one of their answers changes, or when they
+        record a valid answer validated against <question>, in which case
+        <change> is not negative.
+        """
+        count = self._answered.get(question.id, 0) + change
+        self._answered[question.id] = count
+        if count == 0:
+            self._asked.pop(question.id, None)
+        elif change >= 0 and \
+                self._asked.setdefault(question.id, question) is not question:
+            self._asked[question.id] = None
+
     def all_answered(self, survey: Survey) -> bool:
         """
         Return True iff all the students enrolled in this course have a valid
         answer for every question in <survey>.
+
+        The number of students with a valid answer to each question is kept
+        up to date as students enroll and answer, so this takes O(1) time
+        for each question that all of those answers were validated against.
+        The answers to any other question are validated against it instead.
         """
-        for student in self.students:
-            for question in survey.get_questions():
-                if not student.has_answer(question):
+        self._synchronize()
+        for question in survey.get_questions():
+            if self._asked.get(question.id) is question:
+                if self._answered[question.id] != len(self.students):
                     return False
+            elif not all(student.has_answer(question)
+                         for student in self.students):
+                return False
         return True
 
     def get_students(self) -> Tuple[Student, ...]:
@@ -160,12 +430,73 @@ class Course:
         The students in this tuple should be in order according to their id
         from lowest id to highest id.
 
-        Hint: the sort_students function might be useful
+        The students are kept in order of id as they enroll, and the tuple is
+        only made again after new students enroll, or after self.students is
+        changed directly.
+
+        >>> course = Course('CSC148')
+        >>> course.enroll_students([Student(3, 'Mario'), Student(1, 'Misha')])
+        >>> course.enroll_students([Student(2, 'Diane')])
+        >>> [student.name for student in course.get_students()]
+        ['Misha', 'Diane', 'Mario']
+        >>> course.students.pop(0).name
+        'Mario'
+        >>> [student.name for student in course.get_students()]
+        ['Misha', 'Diane']
+        """
+        self._synchronize()
+        if self._view is None:
+            self._view = tuple(self._by_id)
+        return self._view
+
+    def _synchronize(self) -> None:
+        """
+        Update the index, the order and the answer counts of this course from
+        self.students if it was changed, or another list was assigned to it,
+        since they were last updated. Students who are no longer in it stop
+        telling this course when their answers change.
+
+        A list assigned to self.students is replaced by an equal list that
+        records its changes.
         """
-        return tuple(sort_students(self.students, 'id'))
+        if self.students is self._enrolled and not self._enrolled.changed:
+            return
+        if not isinstance(self.students, _StudentList):
+            self.students = _StudentList(self.students)
+        self.students.changed = False
+        self._enrolled = self.students
+        remaining = set(self.students)
+        for student in self._index.values():
+            if student not in remaining:
+                student.drop_course(self)
+        self._index = {student.id: student for student in self.students}
+        self._by_id = sort_students(self.students, 'id')
+        self._ids = [student.id for student in self._by_id]
+        self._view = None
+        self._answered = {}
+        self._asked = {}
+        for student in self.students:
+            self._count_answers(student)
+
+    def _count_answers(self, student: Student) -> None:
+        """
+        Add the valid answers of <student>, who was just enrolled in this
+        course, to the number of valid answers to each question, and make
+        <student> tell this course when their answers change.
+        """
+        student.add_course(self)
+        for question in student.valid_questions():
+            self.count_answer(question, 1)
+
+
+def _student_id(student: Student) -> int:
+    """ Return the id of <student> """
+    return student.id
 
 
 if __name__ == '__main__':
     import python_ta
 
-    python_ta.check_all(config={'extra-imports': ['typing', 'survey']})
+    python_ta.check_all(config={'extra-imports': ['typing', 'bisect',
+                                                  'heapq', 'weakref',
+                                                  'survey']})
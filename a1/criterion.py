@@ -23,7 +23,8 @@ This file contains classes that describe different types of criteria used to
 evaluate a group of answers to a survey question.
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING, List
+import random
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List
 
 if TYPE_CHECKING:
     from survey import Question, Answer
@@ -54,6 +55,33 @@ class Criterion:
         """
         raise NotImplementedError
 
+    def score_valid_answers(self, question: Question,
+                            answers: List[Answer]) -> float:
+        """
+        Return the same score as score_answers, for <answers> that are already
+        known to be valid answers to <question>.
+
+        Implementations that can skip validating <answers> override this
+        method; by default <answers> are validated again by score_answers.
+
+        === Precondition ===
+        len(answers) > 0
+        All answers in <answers> are valid answers to <question>
+        """
+        return self.score_answers(question, answers)
+
+    def start(self, question: Question) -> CriterionState:
+        """
+        Return the state of an empty group of answers to <question>, which
+        answers can be added to and removed from, scored in the same way as
+        score_answers.
+
+        Implementations that can update their score as answers are added and
+        removed override this method; by default the answers are scored again
+        by score_answers every time.
+        """
+        return _AnswerListState(self, question)
+
 
 class HomogeneousCriterion(Criterion):
     """
@@ -72,6 +100,10 @@ class HomogeneousCriterion(Criterion):
         combination of two answers in <answers> and taking the average of all
         of these similarity scores.
 
+        The sum of these similarity scores comes from
+        <question>.total_similarity, which the built-in question types
+        calculate without comparing every combination of two answers.
+
         If there is only one answer in <answers> and it is valid return 1.0
         since a single answer is always identical to itself.
 
@@ -81,17 +113,32 @@ class HomogeneousCriterion(Criterion):
         === Precondition ===
         len(answers) > 0
         """
-        score_comb = []
         for a in answers:
             if not a.is_valid(question):
                 raise InvalidAnswerError
+        return HomogeneousCriterion.score_valid_answers(self, question, answers)
+
+    def score_valid_answers(self, question: Question,
+                            answers: List[Answer]) -> float:
+        """
+        Return the same score as score_answers, without validating <answers>.
+
+        === Precondition ===
+        len(answers) > 0
+        All answers in <answers> are valid answers to <question>
+        """
         if len(answers) == 1:
             return 1.0
-        for i in range(len(answers) - 1):
-            for j in range(i + 1, len(answers)):
-                similarity = question.get_similarity(answers[i], answers[j])
-                score_comb.append(similarity)
-        return sum(score_comb) / len(score_comb)
+        pairs = len(answers) * (len(answers) - 1) // 2
+        return question.total_similarity(answers) / pairs
+
+    def start(self, question: Question) -> SimilarityState:
+        """
+        Return the state of an empty group of answers to <question>, which
+        answers can be added to and removed from, scored in the same way as
+        score_answers.
+        """
+        return SimilarityState(question, False)
 
 
 class HeterogeneousCriterion(HomogeneousCriterion):
@@ -118,9 +165,38 @@ class HeterogeneousCriterion(HomogeneousCriterion):
 
         === Precondition ===
         len(answers) > 0
+
+        >>> from survey import Answer, YesNoQuestion
+        >>> q = YesNoQuestion(1, 'Pizza?')
+        >>> criterion = HeterogeneousCriterion()
+        >>> criterion.score_answers(q, [Answer(True), Answer(True)])
+        0.0
+        >>> criterion.score_answers(q, [Answer(True)])
+        0.0
+        >>> criterion.score_answers(q, [Answer(True), Answer(False)])
+        1.0
         """
         return 1 - super().score_answers(question, answers)
 
+    def score_valid_answers(self, question: Question,
+                            answers: List[Answer]) -> float:
+        """
+        Return the same score as score_answers, without validating <answers>.
+
+        === Precondition ===
+        len(answers) > 0
+        All answers in <answers> are valid answers to <question>
+        """
+        return 1 - super().score_valid_answers(question, answers)
+
+    def start(self, question: Question) -> SimilarityState:
+        """
+        Return the state of an empty group of answers to <question>, which
+        answers can be added to and removed from, scored in the same way as
+        score_answers.
+        """
+        return SimilarityState(question, True)
+
 
 class LonelyMemberCriterion(Criterion):
     """ A criterion used to measure the quality of a group of students
@@ -138,7 +214,9 @@ class LonelyMemberCriterion(Criterion):
         <answers> and will be 1.0 otherwise.
 
         An answer is not unique if there is at least one other answer in
-        <answers> with identical content.
+        <answers> with identical content. The contents of answers to a
+        CheckboxQuestion are identical if they contain the same options, in
+        any order.
 
         Raise InvalidAnswerError if any answer in <answers> is not a valid
         answer to <question>.
@@ -146,24 +224,455 @@ class LonelyMemberCriterion(Criterion):
         === Precondition ===
         len(answers) > 0
         """
-        sorted_answers = []
         for answer in answers:
             if not answer.is_valid(question):
                 raise InvalidAnswerError
-            if answer.is_valid(question):
-                sorted_answers.append(answer.content)
-        sorted_answers = sorted(sorted_answers)
-        if len(sorted_answers) == 1:
+        return self.score_valid_answers(question, answers)
+
+    def score_valid_answers(self, question: Question,
+                            answers: List[Answer]) -> float:
+        """
+        Return the same score as score_answers, without validating <answers>.
+
+        === Precondition ===
+        len(answers) > 0
+        All answers in <answers> are valid answers to <question>
+        """
+        if len(answers) == 1:
             return 0.0
-        for answer in sorted_answers:
-            answer_count = sorted_answers.count(answer)
-            if answer_count == 1:
+        counts = {}
+        for answer in answers:
+            key = _answer_key(answer.content)
+            counts[key] = counts.get(key, 0) + 1
+        for count in counts.values():
+            if count == 1:
                 return 0.0
         return 1.0
 
+    def start(self, question: Question) -> LonelyMemberState:
+        """
+        Return the state of an empty group of answers to <question>, which
+        answers can be added to and removed from, scored in the same way as
+        score_answers.
+        """
+        return LonelyMemberState(question)
+
+
+class CriterionState:
+    """
+    An abstract class representing a group of answers to a question, scored
+    by a criterion, that answers can be added to and removed from one at a
+    time. Criterion.start returns one for an empty group.
+    """
+
+    def __len__(self) -> int:
+        """ Return the number of answers in this group """
+        raise NotImplementedError
+
+    def add(self, answer: Answer) -> None:
+        """
+        Add <answer> to this group.
+        """
+        raise NotImplementedError
+
+    def remove(self, answer: Answer) -> None:
+        """
+        Remove <answer>, or an answer with identical content, from this group.
+
+        === Precondition ===
+        An answer with the same content as <answer> is in this group
+        """
+        raise NotImplementedError
+
+    def score(self) -> float:
+        """
+        Return the score the criterion gives the answers in this group.
+
+        Raise InvalidAnswerError if any answer in this group is not a valid
+        answer to the question.
+
+        === Precondition ===
+        len(self) > 0
+        """
+        raise NotImplementedError
+
+
+class _AnswerListState(CriterionState):
+    """
+    A group of answers to a question, scored by any criterion, that keeps the
+    answers in a list and scores all of them again every time.
+
+    === Private Attributes ===
+    _criterion: the criterion the answers are scored by
+    _question: the question the answers are to
+    _answers: the answers in this group
+    """
+
+    _criterion: Criterion
+    _question: Question
+    _answers: List[Answer]
+
+    def __init__(self, criterion: Criterion, question: Question) -> None:
+        """
+        Initialize an empty group of answers to <question>, scored by
+        <criterion>.
+        """
+        self._criterion = criterion
+        self._question = question
+        self._answers = []
+
+    def __len__(self) -> int:
+        """ Return the number of answers in this group """
+        return len(self._answers)
+
+    def add(self, answer: Answer) -> None:
+        """
+        Add <answer> to this group.
+        """
+        self._answers.append(answer)
+
+    def remove(self, answer: Answer) -> None:
+        """
+        Remove <answer>, or an answer with identical content, from this group.
+
+        === Precondition ===
+        An answer with the same content as <answer> is in this group
+        """
+        for i, other in enumerate(self._answers):
+            if other is answer:
+                self._answers.pop(i)
+                return
+        for i, other in enumerate(self._answers):
+            if other.content == answer.content:
+                self._answers.pop(i)
+                return
+
+    def score(self) -> float:
+        """
+        Return the score the criterion gives the answers in this group.
+
+        Raise InvalidAnswerError if any answer in this group is not a valid
+        answer to the question.
+
+        === Precondition ===
+        len(self) > 0
+        """
+        return self._criterion.score_answers(self._question, self._answers)
+
+
+class SimilarityState(CriterionState):
+    """
+    A group of answers to a question, scored by a HomogeneousCriterion or a
+    HeterogeneousCriterion, that answers can be added to and removed from one
+    at a time.
+
+    The answers are counted by content, and this group keeps the sum of the
+    similarities between every two of them. Adding or removing an answer
+    changes that sum by its similarity to each distinct content in this group
+    times the number of times that content occurs, so it takes time that
+    depends on the number of distinct contents, which the question limits,
+    rather than on the number of answers.
+
+    === Private Attributes ===
+    _question: the question the answers are to
+    _heterogeneous: True iff the answers are scored by a
+        HeterogeneousCriterion
+    _size: the number of answers in this group
+    _invalid: the number of answers in this group that are not valid answers
+        to _question
+    _contents: a dictionary mapping the key of each content of the valid
+        answers in this group (see _answer_key) to one of those answers
+    _counts: a dictionary mapping each key in _contents to the number of
+        times it occurs
+    _total: the sum of the similarities between every two valid answers in
+        this group
+
+    === Representation Invariants ===
+    _size == _invalid + sum(_counts.values())
+    _contents and _counts have the same keys
+    Every value in _counts is at least 1
+    """
+
+    _question: Question
+    _heterogeneous: bool
+    _size: int
+    _invalid: int
+    _contents: Dict[Hashable, Answer]
+    _counts: Dict[Hashable, int]
+    _total: float
+
+    def __init__(self, question: Question, heterogeneous: bool) -> None:
+        """
+        Initialize an empty group of answers to <question>, scored by a
+        HeterogeneousCriterion iff <heterogeneous> is True, and by a
+        HomogeneousCriterion otherwise.
+        """
+        self._question = question
+        self._heterogeneous = heterogeneous
+        self._size = 0
+        self._invalid = 0
+        self._contents = {}
+        self._counts = {}
+        self._total = 0.0
+
+    def __len__(self) -> int:
+        """ Return the number of answers in this group """
+        return self._size
+
+    def add(self, answer: Answer) -> None:
+        """
+        Add <answer> to this group.
+        """
+        self._size += 1
+        if not answer.is_valid(self._question):
+            self._invalid += 1
+            return
+        self._total += self._similarity_to_all(answer)
+        key = _answer_key(answer.content)
+        if key in self._counts:
+            self._counts[key] += 1
+        else:
+            self._contents[key] = answer
+            self._counts[key] = 1
+
+    def remove(self, answer: Answer) -> None:
+        """
+        Remove <answer>, or an answer with identical content, from this group.
+
+        === Precondition ===
+        An answer with the same content as <answer> is in this group
+        """
+        self._size -= 1
+        if not answer.is_valid(self._question):
+            self._invalid -= 1
+            return
+        key = _answer_key(answer.content)
+        if self._counts[key] == 1:
+            del self._contents[key]
+            del self._counts[key]
+        else:
+            self._counts[key] -= 1
+        if self._size == self._invalid:
+            self._total = 0.0
+        else:
+            self._total -= self._similarity_to_all(answer)
+
+    def score(self) -> float:
+        """
+        Return the score the criterion gives the answers in this group, up to
+        floating point rounding.
+
+        Raise InvalidAnswerError if any answer in this group is not a valid
+        answer to the question.
+
+        === Precondition ===
+        len(self) > 0
+        """
+        if self._invalid > 0:
+            raise InvalidAnswerError
+        if self._size == 1:
+            score = 1.0
+        else:
+            score = self._total / (self._size * (self._size - 1) // 2)
+        return 1 - score if self._heterogeneous else score
+
+    def _similarity_to_all(self, answer: Answer) -> float:
+        """
+        Return the sum of the similarities between <answer> and every valid
+        answer in this group.
+
+        === Precondition ===
+        <answer> is a valid answer to the question
+        """
+        keys = list(self._contents)
+        similarities = self._question.similarity_to_many(
+            answer, [self._contents[key] for key in keys])
+        total = 0.0
+        for key, similarity in zip(keys, similarities):
+            total += self._counts[key] * similarity
+        return total
+
+
+class LonelyMemberState(CriterionState):
+    """
+    A group of answers to a question, scored by a LonelyMemberCriterion, that
+    answers can be added to and removed from one at a time. Adding or removing
+    an answer updates the number of times its content occurs, and the number
+    of contents that occur once, in O(1) time, so the score is found without
+    counting the answers again.
+
+    === Private Attributes ===
+    _question: the question the answers are to
+    _size: the number of answers in this group
+    _invalid: the number of answers in this group that are not valid answers
+        to _question
+    _counts: a dictionary mapping the key of each content of the valid
+        answers in this group (see _answer_key) to the number of times it
+        occurs
+    _unique: the number of keys in _counts that occur once
+
+    === Representation Invariants ===
+    _size == _invalid + sum(_counts.values())
+    Every value in _counts is at least 1
+    """
+
+    _question: Question
+    _size: int
+    _invalid: int
+    _counts: Dict[Hashable, int]
+    _unique: int
+
+    def __init__(self, question: Question) -> None:
+        """
+        Initialize an empty group of answers to <question>.
+        """
+        self._question = question
+        self._size = 0
+        self._invalid = 0
+        self._counts = {}
+        self._unique = 0
+
+    def __len__(self) -> int:
+        """ Return the number of answers in this group """
+        return self._size
+
+    def add(self, answer: Answer) -> None:
+        """
+        Add <answer> to this group.
+        """
+        self._size += 1
+        if not answer.is_valid(self._question):
+            self._invalid += 1
+            return
+        key = _answer_key(answer.content)
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        if count == 1:
+            self._unique += 1
+        elif count == 2:
+            self._unique -= 1
+
+    def remove(self, answer: Answer) -> None:
+        """
+        Remove <answer>, or an answer with identical content, from this group.
+
+        === Precondition ===
+        An answer with the same content as <answer> is in this group
+        """
+        self._size -= 1
+        if not answer.is_valid(self._question):
+            self._invalid -= 1
+            return
+        key = _answer_key(answer.content)
+        count = self._counts[key] - 1
+        if count == 0:
+            del self._counts[key]
+            self._unique -= 1
+        else:
+            self._counts[key] = count
+            if count == 1:
+                self._unique += 1
+
+    def score(self) -> float:
+        """
+        Return the score LonelyMemberCriterion.score_answers gives the answers
+        in this group.
+
+        Raise InvalidAnswerError if any answer in this group is not a valid
+        answer to the question.
+
+        === Precondition ===
+        len(self) > 0
+
+        >>> from survey import Answer, YesNoQuestion
+        >>> state = LonelyMemberCriterion().start(YesNoQuestion(1, 'Pizza?'))
+        >>> for content in [True, True, False]:
+        ...     state.add(Answer(content))
+        >>> state.score()
+        0.0
+        >>> state.remove(Answer(False))
+        >>> state.score()
+        1.0
+        """
+        if self._invalid > 0:
+            raise InvalidAnswerError
+        if self._size == 1 or self._unique > 0:
+            return 0.0
+        return 1.0
+
+
+def _states_agree(criterion: Criterion, question: Question,
+                  state: CriterionState, answers: List[Answer],
+                  steps: int, seed: int) -> bool:
+    """
+    Return True iff <state>, which must be empty, scores every group of
+    answers exactly as <criterion>.score_answers does, up to floating point
+    rounding, or raises InvalidAnswerError whenever it does, while <steps>
+    answers chosen from <answers> at random, seeded by <seed>, are added to
+    it or removed from it one at a time.
+
+    >>> from survey import (Answer, CheckboxQuestion, MultipleChoiceQuestion,
+    ...                     NumericQuestion, YesNoQuestion)
+    >>> questions = [
+    ...     (MultipleChoiceQuestion(1, 'Colour?', ['r', 'g', 'b']),
+    ...      ['r', 'g', 'b', 'purple']),
+    ...     (NumericQuestion(2, 'Hours?', 0, 10), [0, 3, 4, 10, -1]),
+    ...     (YesNoQuestion(3, 'Pizza?'), [True, False, 'maybe']),
+    ...     (CheckboxQuestion(4, 'Days?', ['m', 't', 'w']),
+    ...      [['m'], ['t', 'm'], ['m', 't'], ['w', 't', 'm'], ['m', 'm']])]
+    >>> criteria = [HomogeneousCriterion(), HeterogeneousCriterion(),
+    ...             LonelyMemberCriterion()]
+    >>> all(_states_agree(criterion, question, state,
+    ...                   [Answer(content) for content in contents], 400, seed)
+    ...     for seed, (question, contents) in enumerate(questions)
+    ...     for criterion in criteria
+    ...     for state in [criterion.start(question),
+    ...                   _AnswerListState(criterion, question)])
+    True
+    """
+    rng = random.Random(seed)
+    members = []
+    for _ in range(steps):
+        if members and rng.random() < 0.4:
+            state.remove(members.pop(rng.randrange(len(members))))
+        else:
+            members.append(rng.choice(answers))
+            state.add(members[-1])
+        if not members:
+            continue
+        try:
+            expected = criterion.score_answers(question, members)
+        except InvalidAnswerError:
+            expected = None
+        try:
+            score = state.score()
+        except InvalidAnswerError:
+            score = None
+        if (expected is None) != (score is None) or \
+                (score is not None and abs(score - expected) > 1e-9):
+            return False
+    return len(state) == len(members)
+
+
+def _answer_key(content: Any) -> Hashable:
+    """
+    Return a hashable key for the answer content <content>, which is the same
+    for two contents iff they are identical: a frozenset of the options of an
+    answer to a CheckboxQuestion, and <content> itself otherwise.
+
+    === Precondition ===
+    <content> is the content of a valid answer to some question
+
+    >>> _answer_key(['b', 'a']) == _answer_key(['a', 'b'])
+    True
+    """
+    if isinstance(content, list):
+        return frozenset(content)
+    return content
+
 
 if __name__ == '__main__':
     import python_ta
 
-    python_ta.check_all(config={'extra-imports': ['typing',
+    python_ta.check_all(config={'extra-imports': ['typing', 'random',
                                                   'survey']})
@@ -0,0 +1,651 @@
+"""CSC148 Assignment 1
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+=== Module Description ===
+
+This file contains a function that finds a maximum weight matching in a
+general graph, using Edmonds' blossom algorithm with the primal-dual updates
+described by Galil in "Efficient algorithms for finding maximum matching in
+graphs" (ACM Computing Surveys, 1986). It takes O(n^3) time for a graph with
+n vertices, and much less for sparse graphs in practice.
+
+Vertices are numbered from 0. Each edge is an (i, j, weight) tuple, and the
+edge with index k has the two endpoints 2 * k and 2 * k + 1: endpoint
+2 * k is vertex i and endpoint 2 * k + 1 is vertex j. A blossom is either a
+single vertex, numbered as that vertex, or an odd cycle of sub-blossoms,
+numbered from n to 2 * n - 1.
+"""
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple
+
+
+def max_weight_matching(num_vertices: int, edges: List[Tuple[int, int, int]],
+                        max_cardinality: bool = False,
+                        greedy_start: bool = False) -> List[int]:
+    """
+    Return a list whose i-th element is the vertex that vertex i is matched
+    with, or -1 if it is not matched, in a matching of the graph with
+    <num_vertices> vertices and the edges <edges> with the highest total
+    weight.
+
+    If <max_cardinality> is True, the matching has the highest total weight
+    of all the matchings with as many edges as possible.
+
+    If <greedy_start> is True, the search starts from a matching of the edges
+    that are already tight under dual variables chosen greedily, so that it
+    has far fewer augmenting paths left to find. The matching found has as
+    many edges as possible, and if it is a perfect matching it has the highest
+    total weight of all perfect matchings; otherwise its weight may not be the
+    highest.
+
+    === Precondition ===
+    Every edge in <edges> is an (i, j, weight) tuple with
+        0 <= i < num_vertices, 0 <= j < num_vertices, i != j and an integer
+        weight
+    No two edges in <edges> join the same two vertices
+    <greedy_start> is False or <max_cardinality> is True
+
+    >>> max_weight_matching(4, [(0, 1, 2), (1, 2, 6), (2, 3, 2)])
+    [-1, 2, 1, -1]
+    >>> max_weight_matching(4, [(0, 1, 2), (1, 2, 6), (2, 3, 2)], True)
+    [1, 0, 3, 2]
+    >>> max_weight_matching(6, [(0, 1, 9), (0, 2, 9), (1, 2, 10), (1, 3, 5),
+    ...                         (3, 4, 6), (4, 5, 8)], True)
+    [2, 3, 0, 1, 5, 4]
+    >>> max_weight_matching(6, [(0, 1, 9), (0, 2, 9), (1, 2, 10), (1, 3, 5),
+    ...                         (3, 4, 6), (4, 5, 8)], True, True)
+    [2, 3, 0, 1, 5, 4]
+    """
+    if not edges:
+        return [-1] * num_vertices
+    search = _BlossomSearch(num_vertices, edges, max_cardinality)
+    if greedy_start:
+        search.match_greedily()
+    search.run()
+    return search.mates()
+
+
+class _BlossomSearch:
+    """
+    The state of the blossom algorithm on one graph.
+
+    === Private Attributes ===
+    _n: the number of vertices
+    _edges: the (i, j, weight) tuples of the edges
+    _twice: the k-th element is twice the weight of edge k
+    _max_cardinality: True iff the matching must have as many edges as
+        possible
+    _endpoint: the p-th element is the vertex at endpoint p
+    _neighbend: the i-th element is a list of the remote endpoints of the
+        edges at vertex i
+    _mate: the i-th element is the remote endpoint of the matched edge at
+        vertex i, or -1 if vertex i is not matched
+    _label: the b-th element is 0 if blossom b is not labelled, 1 if it is
+        an S-blossom, 2 if it is a T-blossom, and 5 while scan_blossom marks
+        it; for a vertex inside a blossom, the label of the vertex itself
+        only matters for T-blossoms
+    _labelend: the b-th element is the endpoint through which blossom b got
+        its label, or -1 if there is none
+    _inblossom: the i-th element is the top-level blossom that vertex i is in
+    _blossomparent: the b-th element is the blossom that blossom b is
+        directly in, or -1 if it is a top-level blossom
+    _blossomchilds: the b-th element is the list of the sub-blossoms of
+        blossom b, starting from its base and going around the cycle, or None
+    _blossombase: the b-th element is the base vertex of blossom b, or -1 if
+        blossom b is not in use
+    _blossomendps: the b-th element is a list whose i-th element is the
+        endpoint of the edge from _blossomchilds[b][i] to the next
+        sub-blossom, or None
+    _bestedge: the b-th element is the edge with the least slack from
+        blossom b to an S-blossom, or -1
+    _blossombestedges: the b-th element is a list of the edges with the
+        least slack from S-blossom b to each other S-blossom, or None
+    _unusedblossoms: the numbers of the blossoms that are not in use
+    _dualvar: the dual variables of the vertices, followed by those of the
+        blossoms
+    _allowedge: the k-th element is True iff edge k has zero slack, so it
+        may be used by the search
+    _queue: the S-vertices whose edges have not been scanned yet
+    """
+
+    _n: int
+    _edges: List[Tuple[int, int, int]]
+    _twice: List[int]
+    _max_cardinality: bool
+    _endpoint: List[int]
+    _neighbend: List[List[int]]
+    _mate: List[int]
+    _label: List[int]
+    _labelend: List[int]
+    _inblossom: List[int]
+    _blossomparent: List[int]
+    _blossomchilds: List[Optional[List[int]]]
+    _blossombase: List[int]
+    _blossomendps: List[Optional[List[int]]]
+    _bestedge: List[int]
+    _blossombestedges: List[Optional[List[int]]]
+    _unusedblossoms: List[int]
+    _dualvar: List[int]
+    _allowedge: List[bool]
+    _queue: List[int]
+
+    def __init__(self, num_vertices: int, edges: List[Tuple[int, int, int]],
+                 max_cardinality: bool) -> None:
+        """
+        Initialize the search on the graph with <num_vertices> vertices and
+        the edges <edges>, with no edges matched.
+        """
+        n = num_vertices
+        self._n = n
+        self._edges = edges
+        self._twice = [2 * weight for _, _, weight in edges]
+        self._max_cardinality = max_cardinality
+        max_weight = max(0, max(weight for _, _, weight in edges))
+        self._endpoint = [edges[p // 2][p % 2] for p in range(2 * len(edges))]
+        self._neighbend = [[] for _ in range(n)]
+        for k, (i, j, _) in enumerate(edges):
+            self._neighbend[i].append(2 * k + 1)
+            self._neighbend[j].append(2 * k)
+        self._mate = [-1] * n
+        self._label = [0] * (2 * n)
+        self._labelend = [-1] * (2 * n)
+        self._inblossom = list(range(n))
+        self._blossomparent = [-1] * (2 * n)
+        self._blossomchilds = [None] * (2 * n)
+        self._blossombase = list(range(n)) + [-1] * n
+        self._blossomendps = [None] * (2 * n)
+        self._bestedge = [-1] * (2 * n)
+        self._blossombestedges = [None] * (2 * n)
+        self._unusedblossoms = list(range(n, 2 * n))
+        self._dualvar = [max_weight] * n + [0] * n
+        self._allowedge = [False] * len(edges)
+        self._queue = []
+
+    def mates(self) -> List[int]:
+        """
+        Return a list whose i-th element is the vertex that vertex i is
+        matched with, or -1 if it is not matched.
+        """
+        return [self._endpoint[p] if p >= 0 else -1 for p in self._mate]
+
+    def match_greedily(self) -> None:
+        """
+        Lower the dual variable of each vertex, in order, as far as the slack
+        of its edges allows, and match it along an edge that becomes tight to
+        a vertex that is not matched yet, if there is one.
+
+        Every dual variable starts as the highest weight of its vertex's
+        edges, rounded up to an even number, and stays even. The dual
+        variables of all S-vertices then keep the same parity, so the slack of
+        an edge between two S-vertices is always even.
+
+        === Precondition ===
+        No edges are matched
+        """
+        dualvar = self._dualvar
+        endpoint = self._endpoint
+        twice = self._twice
+        for v in range(self._n):
+            if self._neighbend[v]:
+                best = max(twice[p // 2] for p in self._neighbend[v]) // 2
+                dualvar[v] = best + best % 2
+        for v in range(self._n):
+            if self._mate[v] != -1 or not self._neighbend[v]:
+                continue
+            dualvar[v] = max(twice[p // 2] - dualvar[endpoint[p]]
+                             for p in self._neighbend[v])
+            for p in self._neighbend[v]:
+                w = endpoint[p]
+                if self._mate[w] == -1 and \
+                        dualvar[v] + dualvar[w] == twice[p // 2]:
+                    self._mate[v] = p
+                    self._mate[w] = p ^ 1
+                    break
+
+    def run(self) -> None:
+        """
+        Find the matching, one augmenting path per stage, until no stage can
+        augment the matching any more.
+        """
+        n = self._n
+        for _ in range(n):
+            self._label[:] = [0] * (2 * n)
+            self._bestedge[:] = [-1] * (2 * n)
+            self._blossombestedges[n:] = [None] * n
+            self._allowedge[:] = [False] * len(self._edges)
+            self._queue[:] = []
+            for v in range(n):
+                if self._mate[v] == -1 and \
+                        self._label[self._inblossom[v]] == 0:
+                    self._assign_label(v, 1, -1)
+            if not self._stage():
+                break
+            for b in range(n, 2 * n):
+                if self._blossomparent[b] == -1 and \
+                        self._blossombase[b] >= 0 and \
+                        self._label[b] == 1 and self._dualvar[b] == 0:
+                    self._expand_blossom(b, True)
+
+    def _stage(self) -> bool:
+        """
+        Grow alternating trees from the unmatched vertices, changing the dual
+        variables whenever no edge can be used, until the matching is
+        augmented or the dual variables show that it is optimal. Return True
+        iff the matching was augmented.
+        """
+        while True:
+            if self._scan():
+                return True
+            delta_type, delta, delta_edge, delta_blossom = self._delta()
+            self._update_duals(delta)
+            if delta_type == 1:
+                return False
+            elif delta_type == 2:
+                self._allowedge[delta_edge] = True
+                i, j, _ = self._edges[delta_edge]
+                if self._label[self._inblossom[i]] == 0:
+                    i, j = j, i
+                self._queue.append(i)
+            elif delta_type == 3:
+                self._allowedge[delta_edge] = True
+                i, _, _ = self._edges[delta_edge]
+                self._queue.append(i)
+            else:
+                self._expand_blossom(delta_blossom, False)
+
+    def _scan(self) -> bool:
+        """
+        Scan the edges of the S-vertices in the queue, labelling vertices,
+        making blossoms and augmenting the matching along the edges with zero
+        slack. Return True iff the matching was augmented.
+        """
+        label = self._label
+        inblossom = self._inblossom
+        endpoint = self._endpoint
+        allowedge = self._allowedge
+        dualvar = self._dualvar
+        twice = self._twice
+        bestedge = self._bestedge
+        while self._queue:
+            v = self._queue.pop()
+            for p in self._neighbend[v]:
+                k = p // 2
+                w = endpoint[p]
+                if inblossom[v] == inblossom[w]:
+                    continue
+                k_slack = 0
+                if not allowedge[k]:
+                    # The slack of edge k, as in _slack.
+                    k_slack = dualvar[v] + dualvar[w] - twice[k]
+                    if k_slack <= 0:
+                        allowedge[k] = True
+                if allowedge[k]:
+                    if label[inblossom[w]] == 0:
+                        self._assign_label(w, 2, p ^ 1)
+                    elif label[inblossom[w]] == 1:
+                        base = self._scan_blossom(v, w)
+                        if base >= 0:
+                            self._add_blossom(base, k)
+                        else:
+                            self._augment_matching(k)
+                            return True
+                    elif label[w] == 0:
+                        label[w] = 2
+                        self._labelend[w] = p ^ 1
+                else:
+                    if label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                    elif label[w] == 0:
+                        b = w
+                    else:
+                        continue
+                    best = bestedge[b]
+                    if best == -1 or k_slack < dualvar[endpoint[2 * best]] + \
+                            dualvar[endpoint[2 * best + 1]] - twice[best]:
+                        bestedge[b] = k
+        return False
+
+    def _delta(self) -> Tuple[int, int, int, int]:
+        """
+        Return the kind of change to make to the dual variables, the size of
+        the change, and the edge or blossom it is made for, as a tuple
+        (kind, delta, edge, blossom).
+
+        The kinds are 1: the matching is optimal; 2: an edge from a free
+        vertex to an S-vertex gets zero slack; 3: an edge between two
+        S-blossoms gets zero slack; 4: the dual variable of a T-blossom
+        becomes zero.
+        """
+        n = self._n
+        label = self._label
+        delta_type = -1
+        delta = 0
+        delta_edge = -1
+        delta_blossom = -1
+        if not self._max_cardinality:
+            delta_type = 1
+            delta = min(self._dualvar[:n])
+        for v in range(n):
+            if label[self._inblossom[v]] == 0 and self._bestedge[v] != -1:
+                d = self._slack(self._bestedge[v])
+                if delta_type == -1 or d < delta:
+                    delta, delta_type = d, 2
+                    delta_edge = self._bestedge[v]
+        for b in range(2 * n):
+            if self._blossomparent[b] == -1 and label[b] == 1 and \
+                    self._bestedge[b] != -1:
+                d = self._slack(self._bestedge[b]) // 2
+                if delta_type == -1 or d < delta:
+                    delta, delta_type = d, 3
+                    delta_edge = self._bestedge[b]
+        for b in range(n, 2 * n):
+            if self._blossombase[b] >= 0 and self._blossomparent[b] == -1 \
+                    and label[b] == 2 and \
+                    (delta_type == -1 or self._dualvar[b] < delta):
+                delta, delta_type = self._dualvar[b], 4
+                delta_blossom = b
+        if delta_type == -1:
+            # Only possible with max_cardinality: no further growth, so
+            # finish with a final change that keeps the duals feasible.
+            delta_type = 1
+            delta = max(0, min(self._dualvar[:n]))
+        return delta_type, delta, delta_edge, delta_blossom
+
+    def _update_duals(self, delta: int) -> None:
+        """
+        Change the dual variables of the labelled vertices and top-level
+        blossoms by <delta>.
+        """
+        n = self._n
+        for v in range(n):
+            if self._label[self._inblossom[v]] == 1:
+                self._dualvar[v] -= delta
+            elif self._label[self._inblossom[v]] == 2:
+                self._dualvar[v] += delta
+        for b in range(n, 2 * n):
+            if self._blossombase[b] >= 0 and self._blossomparent[b] == -1:
+                if self._label[b] == 1:
+                    self._dualvar[b] += delta
+                elif self._label[b] == 2:
+                    self._dualvar[b] -= delta
+
+    def _slack(self, k: int) -> int:
+        """
+        Return twice the slack of edge <k>.
+        """
+        i, j, _ = self._edges[k]
+        return self._dualvar[i] + self._dualvar[j] - self._twice[k]
+
+    def _blossom_leaves(self, b: int) -> Iterator[int]:
+        """
+        Yield the vertices in blossom <b>.
+        """
+        if b < self._n:
+            yield b
+        else:
+            for t in self._blossomchilds[b]:
+                if t < self._n:
+                    yield t
+                else:
+                    yield from self._blossom_leaves(t)
+
+    def _assign_label(self, w: int, t: int, p: int) -> None:
+        """
+        Give vertex <w> and its top-level blossom the label <t>, through the
+        endpoint <p>. A T-blossom's mate gets the label S in turn.
+        """
+        b = self._inblossom[w]
+        self._label[w] = self._label[b] = t
+        self._labelend[w] = self._labelend[b] = p
+        self._bestedge[w] = self._bestedge[b] = -1
+        if t == 1:
+            self._queue.extend(self._blossom_leaves(b))
+        elif t == 2:
+            base = self._blossombase[b]
+            self._assign_label(self._endpoint[self._mate[base]], 1,
+                               self._mate[base] ^ 1)
+
+    def _scan_blossom(self, v: int, w: int) -> int:
+        """
+        Trace back from the S-vertices <v> and <w> towards the roots of their
+        trees. Return the base of the new blossom if the paths meet, or -1 if
+        they reach two different roots, which gives an augmenting path.
+        """
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = self._inblossom[v]
+            if self._label[b] & 4:
+                base = self._blossombase[b]
+                break
+            path.append(b)
+            self._label[b] = 5
+            if self._labelend[b] == -1:
+                v = -1
+            else:
+                v = self._endpoint[self._labelend[b]]
+                b = self._inblossom[v]
+                v = self._endpoint[self._labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            self._label[b] = 1
+        return base
+
+    def _add_blossom(self, base: int, k: int) -> None:
+        """
+        Make a new blossom with base <base> from the cycle closed by edge
+        <k>, label it S, and find its least-slack edges to other S-blossoms.
+        """
+        v, w, _ = self._edges[k]
+        inblossom = self._inblossom
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = self._unusedblossoms.pop()
+        self._blossombase[b] = base
+        self._blossomparent[b] = -1
+        self._blossomparent[bb] = b
+        path = []
+        endps = []
+        self._blossomchilds[b] = path
+        self._blossomendps[b] = endps
+        while bv != bb:
+            self._blossomparent[bv] = b
+            path.append(bv)
+            endps.append(self._labelend[bv])
+            v = self._endpoint[self._labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            self._blossomparent[bw] = b
+            path.append(bw)
+            endps.append(self._labelend[bw] ^ 1)
+            w = self._endpoint[self._labelend[bw]]
+            bw = inblossom[w]
+        self._label[b] = 1
+        self._labelend[b] = self._labelend[bb]
+        self._dualvar[b] = 0
+        for v in self._blossom_leaves(b):
+            if self._label[inblossom[v]] == 2:
+                # A T-vertex becomes an S-vertex inside the new S-blossom.
+                self._queue.append(v)
+            inblossom[v] = b
+        best_to = [-1] * (2 * self._n)
+        for bv in path:
+            if self._blossombestedges[bv] is None:
+                lists = [[p // 2 for p in self._neighbend[u]]
+                         for u in self._blossom_leaves(bv)]
+            else:
+                lists = [self._blossombestedges[bv]]
+            for edge_list in lists:
+                for e in edge_list:
+                    i, j, _ = self._edges[e]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if bj != b and self._label[bj] == 1 and \
+                            (best_to[bj] == -1 or
+                             self._slack(e) < self._slack(best_to[bj])):
+                        best_to[bj] = e
+            self._blossombestedges[bv] = None
+            self._bestedge[bv] = -1
+        self._blossombestedges[b] = [e for e in best_to if e != -1]
+        self._bestedge[b] = -1
+        for e in self._blossombestedges[b]:
+            if self._bestedge[b] == -1 or \
+                    self._slack(e) < self._slack(self._bestedge[b]):
+                self._bestedge[b] = e
+
+    def _expand_blossom(self, b: int, endstage: bool) -> None:
+        """
+        Turn the sub-blossoms of blossom <b> into top-level blossoms. If
+        <endstage> is False, <b> is a T-blossom whose sub-blossoms are
+        relabelled so that the alternating tree stays intact.
+        """
+        n = self._n
+        for s in self._blossomchilds[b]:
+            self._blossomparent[s] = -1
+            if s < n:
+                self._inblossom[s] = s
+            elif endstage and self._dualvar[s] == 0:
+                self._expand_blossom(s, endstage)
+            else:
+                for v in self._blossom_leaves(s):
+                    self._inblossom[v] = s
+        if not endstage and self._label[b] == 2:
+            self._relabel_expanded(b)
+        self._label[b] = self._labelend[b] = -1
+        self._blossomchilds[b] = self._blossomendps[b] = None
+        self._blossombase[b] = -1
+        self._blossombestedges[b] = None
+        self._bestedge[b] = -1
+        self._unusedblossoms.append(b)
+
+    def _relabel_expanded(self, b: int) -> None:
+        """
+        Relabel the sub-blossoms of the expanded T-blossom <b>: those on the
+        even-length path from the sub-blossom the tree enters through to the
+        base alternate between T and S, and the others may be reached again.
+        """
+        childs = self._blossomchilds[b]
+        endps = self._blossomendps[b]
+        endpoint = self._endpoint
+        entrychild = self._inblossom[endpoint[self._labelend[b] ^ 1]]
+        j = childs.index(entrychild)
+        if j & 1:
+            j -= len(childs)
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        p = self._labelend[b]
+        while j != 0:
+            self._label[endpoint[p ^ 1]] = 0
+            self._label[endpoint[endps[j - endptrick] ^ endptrick ^ 1]] = 0
+            self._assign_label(endpoint[p ^ 1], 2, p)
+            self._allowedge[endps[j - endptrick] // 2] = True
+            j += jstep
+            p = endps[j - endptrick] ^ endptrick
+            self._allowedge[p // 2] = True
+            j += jstep
+        bv = childs[j]
+        self._label[endpoint[p ^ 1]] = self._label[bv] = 2
+        self._labelend[endpoint[p ^ 1]] = self._labelend[bv] = p
+        self._bestedge[bv] = -1
+        j += jstep
+        while childs[j] != entrychild:
+            bv = childs[j]
+            if self._label[bv] == 1:
+                j += jstep
+                continue
+            reached = -1
+            for v in self._blossom_leaves(bv):
+                if self._label[v] != 0:
+                    reached = v
+                    break
+            if reached != -1:
+                self._label[reached] = 0
+                self._label[endpoint[self._mate[self._blossombase[bv]]]] = 0
+                self._assign_label(reached, 2, self._labelend[reached])
+            j += jstep
+
+    def _augment_blossom(self, b: int, v: int) -> None:
+        """
+        Swap the matched and unmatched edges on the even-length path through
+        blossom <b> from vertex <v> to the base, so that <v> becomes the base.
+        """
+        t = v
+        while self._blossomparent[t] != b:
+            t = self._blossomparent[t]
+        if t >= self._n:
+            self._augment_blossom(t, v)
+        childs = self._blossomchilds[b]
+        endps = self._blossomendps[b]
+        i = j = childs.index(t)
+        if i & 1:
+            j -= len(childs)
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = childs[j]
+            p = endps[j - endptrick] ^ endptrick
+            if t >= self._n:
+                self._augment_blossom(t, self._endpoint[p])
+            j += jstep
+            t = childs[j]
+            if t >= self._n:
+                self._augment_blossom(t, self._endpoint[p ^ 1])
+            self._mate[self._endpoint[p]] = p ^ 1
+            self._mate[self._endpoint[p ^ 1]] = p
+        self._blossomchilds[b] = childs[i:] + childs[:i]
+        self._blossomendps[b] = endps[i:] + endps[:i]
+        self._blossombase[b] = self._blossombase[self._blossomchilds[b][0]]
+
+    def _augment_matching(self, k: int) -> None:
+        """
+        Swap the matched and unmatched edges on the augmenting path through
+        edge <k> between the roots of two alternating trees.
+        """
+        v, w, _ = self._edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = self._inblossom[s]
+                if bs >= self._n:
+                    self._augment_blossom(bs, s)
+                self._mate[s] = p
+                if self._labelend[bs] == -1:
+                    break
+                t = self._endpoint[self._labelend[bs]]
+                bt = self._inblossom[t]
+                s = self._endpoint[self._labelend[bt]]
+                j = self._endpoint[self._labelend[bt] ^ 1]
+                if bt >= self._n:
+                    self._augment_blossom(bt, j)
+                self._mate[j] = self._labelend[bt]
+                p = self._labelend[bt] ^ 1
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={'extra-imports': ['typing']})
+
+    import doctest
+    doctest.testmod()
@@ -23,13 +23,26 @@ This file contains classes that describe a survey as well as classes that
 described different types of questions that can be asked in a given survey.
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING, Union, Dict, List
-from criterion import HomogeneousCriterion, InvalidAnswerError
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Union, Dict, FrozenSet, \
+    Iterator, List, Optional, Tuple
+from criterion import HomogeneousCriterion, HeterogeneousCriterion, \
+    InvalidAnswerError
 
 if TYPE_CHECKING:
     from criterion import Criterion
     from grouper import Grouping
-    from course import Student
+    from course import Course, Student
+
+
+# The most sets of students whose scores a Survey remembers by default.
+SCORE_CACHE_SIZE = 4096
+
+# The most distinct answer contents whose bitmasks a CheckboxQuestion
+# remembers. A question with k options has more than k! valid contents, so
+# without a limit the bitmasks of ever more distinct answers would be kept.
+MASK_MEMO_SIZE = 1024
 
 
 class Question:
@@ -67,6 +80,17 @@ class Question:
         """
         raise NotImplementedError
 
+    def ingest_answer(self, answer: Answer) -> bool:
+        """
+        Return True iff <answer> is a valid answer to this question, and if it
+        is, remember anything that makes it quicker to compare. Student calls
+        this when it records <answer>, which is not changed.
+
+        By default <answer> is only validated. Subclasses override this method
+        to remember answer contents in a form that is quicker to compare.
+        """
+        return self.validate_answer(answer)
+
     def get_similarity(self, answer1: Answer, answer2: Answer) -> float:
         """ Return a float between 0.0 and 1.0 indicating how similar two
         answers are.
@@ -76,6 +100,57 @@ class Question:
         """
         raise NotImplementedError
 
+    def similarity_to_many(self, answer: Answer,
+                           answers: List[Answer]) -> List[float]:
+        """ Return a list whose i-th element is the similarity between <answer>
+        and answers[i], exactly as get_similarity would calculate it.
+
+        Subclasses override this method to compare all of <answers> at once
+        instead of calling get_similarity once for each of them.
+
+        === Precondition ===
+        <answer> and all answers in <answers> are valid answers to this question
+        """
+        return [self.get_similarity(answer, other) for other in answers]
+
+    def similarity_matrix(self, answers: List[Answer]) -> List[List[float]]:
+        """ Return a list of lists whose element [i][j] is the similarity
+        between answers[i] and answers[j], exactly as get_similarity would
+        calculate it.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+        """
+        return [self.similarity_to_many(answer, answers) for answer in answers]
+
+    def total_similarity(self, answers: List[Answer]) -> float:
+        """ Return the sum of the similarities between every two answers in
+        <answers>.
+
+        This compares every pair of answers; subclasses override it with a
+        closed form that does not need to.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+        """
+        similarities = []
+        for i in range(len(answers) - 1):
+            similarities.extend(self.similarity_to_many(answers[i],
+                                                        answers[i + 1:]))
+        return sum(similarities)
+
+    def encode(self, answer: Answer) -> List[float]:
+        """ Return a list of numbers that places <answer> in space, so that the
+        distance between the places of two answers grows as their similarity
+        falls.
+
+        Questions that cannot place their answers return an empty list.
+
+        === Precondition ===
+        <answer> is a valid answer to this question
+        """
+        return []
+
 
 class MultipleChoiceQuestion(Question):
     """ A question whose answers can be one of several options
@@ -104,6 +179,12 @@ class MultipleChoiceQuestion(Question):
         Question.__init__(self, id_, text)
         self._options = options
 
+    def get_options(self) -> List[str]:
+        """
+        Return the possible answers to this question, in order.
+        """
+        return self._options
+
     def __str__(self) -> str:
         """
         Return a string representation of this question including the
@@ -136,6 +217,56 @@ class MultipleChoiceQuestion(Question):
         else:
             return 0.0
 
+    def similarity_to_many(self, answer: Answer,
+                           answers: List[Answer]) -> List[float]:
+        """
+        Return a list whose i-th element is 1.0 iff <answer>.content and
+        answers[i].content are equal and 0.0 otherwise.
+
+        === Precondition ===
+        <answer> and all answers in <answers> are valid answers to this question
+
+        >>> q = MultipleChoiceQuestion(1, 'Colour?', ['red', 'blue'])
+        >>> q.similarity_to_many(Answer('red'), [Answer('blue'), Answer('red')])
+        [0.0, 1.0]
+        """
+        content = answer.content
+        return [1.0 if other.content == content else 0.0 for other in answers]
+
+    def total_similarity(self, answers: List[Answer]) -> float:
+        """
+        Return the sum of the similarities between every two answers in
+        <answers>.
+
+        Two answers are only similar when they are equal, so this is the
+        number of pairs of equal answers, counted in O(len(answers)) time from
+        the number of times each option was chosen.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+
+        >>> q = MultipleChoiceQuestion(1, 'Colour?', ['red', 'blue'])
+        >>> q.total_similarity([Answer('red'), Answer('blue'), Answer('red')])
+        1.0
+        """
+        return float(_count_equal_pairs([a.content for a in answers]))
+
+    def encode(self, answer: Answer) -> List[float]:
+        """
+        Return a list with one number for each option of this question, which
+        is sqrt(0.5) for the option in <answer> and 0.0 for the others, so
+        that the places of two different answers are 1.0 apart.
+
+        === Precondition ===
+        <answer> is a valid answer to this question
+
+        >>> q = MultipleChoiceQuestion(1, 'Colour?', ['red', 'blue'])
+        >>> q.encode(Answer('blue')) == [0.0, 0.5 ** 0.5]
+        True
+        """
+        return [0.5 ** 0.5 if option == answer.content else 0.0
+                for option in self._options]
+
 
 class NumericQuestion(Question):
     """ A question whose answer can be an integer between some
@@ -166,6 +297,18 @@ class NumericQuestion(Question):
         self._min = min_
         self._max = max_
 
+    def get_min(self) -> int:
+        """
+        Return the minimum possible answer to this question.
+        """
+        return self._min
+
+    def get_max(self) -> int:
+        """
+        Return the maximum possible answer to this question.
+        """
+        return self._max
+
     def __str__(self) -> str:
         """
         Return a string representation of this question including the
@@ -217,6 +360,88 @@ class NumericQuestion(Question):
         s2 = s1 / (self._max - self._min)
         return 1 - s2
 
+    def similarity_to_many(self, answer: Answer,
+                           answers: List[Answer]) -> List[float]:
+        """
+        Return a list whose i-th element is the similarity between <answer>
+        and answers[i], calculated in the same way as get_similarity.
+
+        === Precondition ===
+        <answer> and all answers in <answers> are valid answers to this question
+
+        >>> q = NumericQuestion(1, 'Hours?', 0, 4)
+        >>> q.similarity_to_many(Answer(1), [Answer(1), Answer(4), Answer(0)])
+        [1.0, 0.25, 0.75]
+        """
+        return self._similarities(answer.content,
+                                  [other.content for other in answers])
+
+    def similarity_matrix(self, answers: List[Answer]) -> List[List[float]]:
+        """
+        Return a list of lists whose element [i][j] is the similarity between
+        answers[i] and answers[j], calculated in the same way as
+        get_similarity.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+
+        >>> q = NumericQuestion(1, 'Hours?', 0, 4)
+        >>> q.similarity_matrix([Answer(1), Answer(3)])
+        [[1.0, 0.5], [0.5, 1.0]]
+        """
+        contents = [answer.content for answer in answers]
+        return [self._similarities(content, contents) for content in contents]
+
+    def total_similarity(self, answers: List[Answer]) -> float:
+        """
+        Return the sum of the similarities between every two answers in
+        <answers>.
+
+        Each pair contributes 1.0 minus its absolute difference over the range
+        of this question, and the sum of the absolute differences of all pairs
+        is found in O(n log n) time by sorting the answers: the i-th smallest
+        answer is larger than or equal to the i answers before it.
+
+        The result may differ from adding up get_similarity for every pair by
+        floating point rounding error.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+
+        >>> q = NumericQuestion(1, 'Hours?', 0, 4)
+        >>> q.total_similarity([Answer(1), Answer(3), Answer(1)])
+        2.0
+        """
+        differences = 0
+        prefix = 0
+        for i, content in enumerate(sorted(a.content for a in answers)):
+            differences += content * i - prefix
+            prefix += content
+        pairs = len(answers) * (len(answers) - 1) // 2
+        return pairs - differences / (self._max - self._min)
+
+    def encode(self, answer: Answer) -> List[float]:
+        """
+        Return a list with the distance of <answer> from the minimum answer,
+        as a fraction of the range of answers, so that the places of two
+        answers are 1.0 - their similarity apart.
+
+        === Precondition ===
+        <answer> is a valid answer to this question
+
+        >>> NumericQuestion(1, 'Hours?', 0, 4).encode(Answer(1))
+        [0.25]
+        """
+        return [(answer.content - self._min) / (self._max - self._min)]
+
+    def _similarities(self, content: int, contents: List[int]) -> List[float]:
+        """
+        Return a list whose i-th element is the similarity between answers
+        with contents <content> and contents[i].
+        """
+        span = self._max - self._min
+        return [1 - abs(other - content) / span for other in contents]
+
 
 class YesNoQuestion(Question):
     """ A question whose answer is either yes (represented by True) or
@@ -267,21 +492,76 @@ class YesNoQuestion(Question):
         else:
             return 0.0
 
+    def similarity_to_many(self, answer: Answer,
+                           answers: List[Answer]) -> List[float]:
+        """
+        Return a list whose i-th element is 1.0 iff <answer>.content is equal
+        to answers[i].content and 0.0 otherwise.
+
+        === Precondition ===
+        <answer> and all answers in <answers> are valid answers to this question
+
+        >>> q = YesNoQuestion(1, 'Morning person?')
+        >>> q.similarity_to_many(Answer(True), [Answer(False), Answer(True)])
+        [0.0, 1.0]
+        """
+        content = answer.content
+        return [1.0 if other.content == content else 0.0 for other in answers]
+
+    def total_similarity(self, answers: List[Answer]) -> float:
+        """
+        Return the sum of the similarities between every two answers in
+        <answers>, which is the number of pairs of equal answers.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+
+        >>> q = YesNoQuestion(1, 'Morning person?')
+        >>> q.total_similarity([Answer(True), Answer(True), Answer(True)])
+        3.0
+        """
+        return float(_count_equal_pairs([a.content for a in answers]))
+
+    def encode(self, answer: Answer) -> List[float]:
+        """
+        Return [1.0] if <answer> is yes and [0.0] if it is no.
+
+        === Precondition ===
+        <answer> is a valid answer to this question
+
+        >>> YesNoQuestion(1, 'Morning person?').encode(Answer(True))
+        [1.0]
+        """
+        return [1.0 if answer.content else 0.0]
+
 
 class CheckboxQuestion(MultipleChoiceQuestion):
     """ A question whose answers can be one or more of several options
 
+    Each answer is compared as a bitmask with bit i set iff it contains the
+    i-th option. The bitmasks of up to MASK_MEMO_SIZE distinct contents of
+    the valid answers recorded by students (see ingest_answer) are
+    remembered, so they are not calculated again.
+
     === Public Attributes ===
     id: the id of this question
     text: the text of this question
 
+    === Private Attributes ===
+    _bits: a dictionary mapping each option to the bit that stands for it
+    _known_masks: a dictionary mapping each of the first distinct contents of
+        the valid answers recorded, as a tuple, to its bitmask
+
     === Representation Invariants ===
     text is not the empty string
+    len(_known_masks) <= MASK_MEMO_SIZE
     """
 
     id: int
     text: str
     _options: List[str]
+    _bits: Dict[str, int]
+    _known_masks: Dict[Tuple[str, ...], int]
 
     def __init__(self, id_: int, text: str, options: List[str]) -> None:
         """
@@ -293,6 +573,8 @@ class CheckboxQuestion(MultipleChoiceQuestion):
         <options> contains at least two elements
         """
         MultipleChoiceQuestion.__init__(self, id_, text, options)
+        self._bits = {option: 1 << i for i, option in enumerate(options)}
+        self._known_masks = {}
 
     def __str__(self) -> str:
         """
@@ -310,16 +592,69 @@ class CheckboxQuestion(MultipleChoiceQuestion):
 
         An answer is valid iff its content is a non-empty list containing
         unique possible answers to this question.
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> q.validate_answer(Answer(['C', 'Python']))
+        True
+        >>> q.validate_answer(Answer(['C', 'C']))
+        False
         """
-        if not isinstance(answer.content, list) or not answer.content:
+        return self.get_mask(answer) is not None
+
+    def ingest_answer(self, answer: Answer) -> bool:
+        """
+        Return True iff <answer> is a valid answer to this question, and if it
+        is, remember the bitmask of its content, so that it is only calculated
+        once for all the answers recorded with the same options in the same
+        order. Once the bitmasks of MASK_MEMO_SIZE distinct contents are
+        remembered, the bitmasks of new contents are calculated when they are
+        needed instead. <answer> is not changed.
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> a1, a2 = Answer(['C', 'Java']), Answer(['C', 'Java'])
+        >>> q.ingest_answer(a1), q.ingest_answer(a2)
+        (True, True)
+        >>> a1.content.append('Python')
+        >>> q.get_mask(a1), q.get_mask(a2)
+        (7, 3)
+        """
+        mask = self.get_mask(answer)
+        if mask is None:
             return False
-        for option in answer.content:
-            if option not in self._options:
-                return False
-            if answer.content.count(option) != 1:
-                return False
+        if len(self._known_masks) < MASK_MEMO_SIZE:
+            self._known_masks[tuple(answer.content)] = mask
         return True
 
+    def get_mask(self, answer: Answer) -> Optional[int]:
+        """
+        Return the bitmask with bit i set iff <answer>.content contains the
+        i-th option of this question, or None if <answer> is not a valid
+        answer to this question.
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> q.get_mask(Answer(['Python', 'C'])), q.get_mask(Answer([]))
+        (5, None)
+        """
+        content = answer.content
+        if not isinstance(content, list) or not content:
+            return None
+        try:
+            mask = self._known_masks.get(tuple(content))
+        except TypeError:
+            return None
+        if mask is not None:
+            return mask
+        mask = 0
+        for option in content:
+            try:
+                bit = self._bits.get(option)
+            except TypeError:
+                return None
+            if bit is None or mask & bit:
+                return None
+            mask |= bit
+        return mask
+
     def get_similarity(self, answer1: Answer, answer2: Answer) -> float:
         """
         Return the similarity between <answer1> and <answer2>.
@@ -334,22 +669,145 @@ class CheckboxQuestion(MultipleChoiceQuestion):
         both are ["c", "b"] and the unique strings that appear in both are
         ["a", "b", "c", "d"].
 
+        These are the number of bits set in the bitwise and and or of the
+        bitmasks of the two answers.
+
         === Precondition ===
         <answer1> and <answer2> are both valid answers to this question
+
+        >>> q = CheckboxQuestion(1, 'Letters?', ['a', 'b', 'c', 'd'])
+        >>> q.get_similarity(Answer(['a', 'b', 'c']), Answer(['c', 'b', 'd']))
+        0.5
         """
-        unique_strings = []
-        for item in answer1.content:
-            if item not in unique_strings:
-                unique_strings.append(item)
-        for item in answer2.content:
-            if item not in unique_strings:
-                unique_strings.append(item)
-        ratio = 0
-        for item in answer1.content:
-            if item in answer2.content:
-                ratio += 1
-        possible = len(unique_strings)
-        return ratio / possible
+        return self._similarities(self.get_mask(answer1),
+                                  [self.get_mask(answer2)])[0]
+
+    def similarity_to_many(self, answer: Answer,
+                           answers: List[Answer]) -> List[float]:
+        """
+        Return a list whose i-th element is the similarity between <answer>
+        and answers[i], calculated in the same way as get_similarity.
+
+        === Precondition ===
+        <answer> and all answers in <answers> are valid answers to this question
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> q.similarity_to_many(Answer(['C', 'Python']),
+        ...                      [Answer(['Python', 'C']), Answer(['Java'])])
+        [1.0, 0.0]
+        """
+        return self._similarities(self._masks([answer])[0],
+                                  self._masks(answers))
+
+    def similarity_matrix(self, answers: List[Answer]) -> List[List[float]]:
+        """
+        Return a list of lists whose element [i][j] is the similarity between
+        answers[i] and answers[j], calculated in the same way as
+        get_similarity.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> q.similarity_matrix([Answer(['C', 'Java']), Answer(['Java'])])
+        [[1.0, 0.5], [0.5, 1.0]]
+        """
+        masks = self._masks(answers)
+        return [self._similarities(mask, masks) for mask in masks]
+
+    def total_similarity(self, answers: List[Answer]) -> float:
+        """
+        Return the sum of the similarities between every two answers in
+        <answers>.
+
+        Answers containing the same options are counted together, so that each
+        distinct pair of answers only has its similarity calculated once. There
+        are at most 2 ** len(options) distinct answers however many answers
+        there are.
+
+        The result may differ from adding up get_similarity for every pair by
+        floating point rounding error.
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> q.total_similarity([Answer(['C', 'Java']), Answer(['Java', 'C']),
+        ...                     Answer(['Java'])])
+        2.0
+        """
+        counts = {}
+        for mask in self._masks(answers):
+            counts[mask] = counts.get(mask, 0) + 1
+        masks = list(counts)
+        # Answers with the same options are identical to each other.
+        total = 0.0
+        for count in counts.values():
+            total += count * (count - 1) // 2
+        for i in range(len(masks) - 1):
+            similarities = self._similarities(masks[i], masks[i + 1:])
+            for j, similarity in enumerate(similarities, i + 1):
+                total += counts[masks[i]] * counts[masks[j]] * similarity
+        return total
+
+    def encode(self, answer: Answer) -> List[float]:
+        """
+        Return a list with one number for each option of this question, which
+        is sqrt(0.5) for the options in <answer> and 0.0 for the others, so
+        that two answers that differ by one option are sqrt(0.5) apart.
+
+        === Precondition ===
+        <answer> is a valid answer to this question
+
+        >>> q = CheckboxQuestion(1, 'Languages?', ['C', 'Java', 'Python'])
+        >>> q.encode(Answer(['Python', 'C'])) == [0.5 ** 0.5, 0.0, 0.5 ** 0.5]
+        True
+        """
+        chosen = set(answer.content)
+        return [0.5 ** 0.5 if option in chosen else 0.0
+                for option in self._options]
+
+    def _masks(self, answers: List[Answer]) -> List[int]:
+        """
+        Return a list whose i-th element is the bitmask of answers[i].
+
+        === Precondition ===
+        All answers in <answers> are valid answers to this question
+        """
+        known = self._known_masks
+        masks = []
+        for answer in answers:
+            mask = known.get(tuple(answer.content))
+            masks.append(self.get_mask(answer) if mask is None else mask)
+        return masks
+
+    @staticmethod
+    def _similarities(mask: int, masks: List[int]) -> List[float]:
+        """
+        Return a list whose i-th element is the similarity between the answers
+        whose bitmasks are <mask> and masks[i].
+        """
+        return [bin(mask & other).count('1') / bin(mask | other).count('1')
+                for other in masks]
+
+
+def _count_equal_pairs(contents: List[Any]) -> int:
+    """
+    Return the number of pairs of equal elements in <contents>.
+
+    === Precondition ===
+    All elements of <contents> are hashable
+
+    >>> _count_equal_pairs(['a', 'b', 'a', 'a'])
+    3
+    """
+    counts = {}
+    for content in contents:
+        counts[content] = counts.get(content, 0) + 1
+    pairs = 0
+    for count in counts.values():
+        pairs += count * (count - 1) // 2
+    return pairs
 
 
 class Answer:
@@ -370,6 +828,570 @@ class Answer:
         return question.validate_answer(self)
 
 
+class AnswerStore:
+    """
+    The answers of many students to the questions of a survey, stored as one
+    typed column per question instead of one Answer object per student and
+    question.
+
+    Each answer is encoded as a single number in the column of its question:
+    a NumericQuestion stores the answer itself, a MultipleChoiceQuestion the
+    index of the chosen option, a YesNoQuestion 1 for yes and 0 for no, and a
+    CheckboxQuestion a bitmask with bit i set iff option i was chosen. Answers
+    that cannot be encoded that way (invalid answers, and answers to other
+    kinds of questions) are kept as Answer objects instead.
+
+    Students added to this store keep working as before: their get_answer and
+    set_answer methods read from and write to this store. The options of an
+    encoded answer to a CheckboxQuestion are returned in the same order as the
+    question's options.
+
+    === Private Attributes ===
+    _questions: a dictionary mapping each question's id to the question itself
+    _rows: a dictionary mapping each student's id to their row in this store
+    _columns: a dictionary mapping each question's id to its column, or to None
+              if its answers cannot be encoded
+    _states: a dictionary mapping each question's id to an array whose i-th
+              element is NO_ANSWER, ENCODED or OVERFLOW, for the answer in row i
+    _overflow: a dictionary mapping (row, question id) to the answers that are
+              not encoded in a column
+    _overflow_valid: a dictionary mapping (row, question id) to True iff the
+              answer in _overflow with the same key was recorded as valid
+
+    === Representation Invariants ===
+    Every column and every array in _states has one element per row
+    An answer is in _overflow iff its state is OVERFLOW, or its question is
+        not in _questions
+    _overflow and _overflow_valid have the same keys
+    Only valid answers are encoded in a column
+    """
+
+    NO_ANSWER = 0
+    ENCODED = 1
+    OVERFLOW = 2
+
+    _questions: Dict[int, Question]
+    _rows: Dict[int, int]
+    _columns: Dict[int, Optional[Union[array, List[int]]]]
+    _states: Dict[int, array]
+    _overflow: Dict[Tuple[int, int], Answer]
+    _overflow_valid: Dict[Tuple[int, int], bool]
+
+    def __init__(self, questions: List[Question]) -> None:
+        """ Initialize an empty store for the answers to <questions> """
+        self._questions = {}
+        self._rows = {}
+        self._columns = {}
+        self._states = {}
+        self._overflow = {}
+        self._overflow_valid = {}
+        for question in questions:
+            self._questions[question.id] = question
+            self._states[question.id] = array('b')
+            if isinstance(question, CheckboxQuestion):
+                if len(question.get_options()) <= 64:
+                    self._columns[question.id] = array('Q')
+                else:
+                    self._columns[question.id] = []
+            elif isinstance(question, (MultipleChoiceQuestion, YesNoQuestion,
+                                       NumericQuestion)):
+                self._columns[question.id] = array('q')
+            else:
+                self._columns[question.id] = None
+
+    def __len__(self) -> int:
+        """ Return the number of students in this store """
+        return len(self._rows)
+
+    def add_students(self, students: List[Student]) -> None:
+        """
+        Move the answers of every student in <students> into this store, and
+        make their get_answer and set_answer methods use this store from now
+        on. Students that were already added to this store are skipped.
+
+        === Precondition ===
+        No two students in this store have the same id
+        """
+        for student in students:
+            if student.id in self._rows:
+                continue
+            row = len(self._rows)
+            self._rows[student.id] = row
+            for question_id, column in self._columns.items():
+                self._states[question_id].append(self.NO_ANSWER)
+                if column is not None:
+                    column.append(0)
+            answers = _AnswerRow(self, row)
+            valid = _ValidityRow(self, row)
+            for question_id, answer, validity in student.recorded_answers():
+                answers[question_id] = answer
+                valid[question_id] = validity
+            student.use_answers(answers, valid)
+
+    def get(self, row: int, question_id: int) -> Optional[Answer]:
+        """
+        Return the answer in <row> to the question with id <question_id>, or
+        None if there is no such answer.
+        """
+        if question_id not in self._questions:
+            return self._overflow.get((row, question_id))
+        state = self._states[question_id][row]
+        if state == self.NO_ANSWER:
+            return None
+        if state == self.OVERFLOW:
+            return self._overflow[(row, question_id)]
+        return Answer(self._decode(self._questions[question_id],
+                                   self._columns[question_id][row]))
+
+    def set(self, row: int, question_id: int, answer: Answer) -> None:
+        """
+        Record <answer> as the answer in <row> to the question with id
+        <question_id>.
+        """
+        self._overflow.pop((row, question_id), None)
+        self._overflow_valid.pop((row, question_id), None)
+        if question_id not in self._questions:
+            self._overflow[(row, question_id)] = answer
+            self._overflow_valid[(row, question_id)] = False
+            return
+        code = self._encode(self._questions[question_id], answer)
+        if code is None:
+            self._states[question_id][row] = self.OVERFLOW
+            self._overflow[(row, question_id)] = answer
+            self._overflow_valid[(row, question_id)] = False
+        else:
+            self._columns[question_id][row] = code
+            self._states[question_id][row] = self.ENCODED
+
+    def is_valid(self, row: int, question_id: int) -> Optional[bool]:
+        """
+        Return True iff the answer in <row> to the question with id
+        <question_id> was recorded as valid, or None if there is no such
+        answer.
+        """
+        if question_id in self._questions:
+            state = self._states[question_id][row]
+            if state == self.NO_ANSWER:
+                return None
+            if state == self.ENCODED:
+                return True
+        return self._overflow_valid.get((row, question_id))
+
+    def set_valid(self, row: int, question_id: int, valid: bool) -> None:
+        """
+        Record whether the answer in <row> to the question with id
+        <question_id> is valid.
+
+        === Precondition ===
+        There is an answer in <row> to the question with id <question_id>
+        """
+        if (row, question_id) in self._overflow:
+            self._overflow_valid[(row, question_id)] = valid
+
+    def question_ids(self, row: int) -> List[int]:
+        """ Return the ids of the questions answered in <row> """
+        ids = [question_id for question_id, states in self._states.items()
+               if states[row] != self.NO_ANSWER]
+        for row_, question_id in self._overflow:
+            if row_ == row and question_id not in self._questions:
+                ids.append(question_id)
+        return ids
+
+    def _encode(self, question: Question, answer: Answer) -> Optional[int]:
+        """
+        Return the number encoding <answer> in the column of <question>, or
+        None if <answer> cannot be encoded.
+        """
+        if self._columns[question.id] is None \
+                or not question.validate_answer(answer):
+            return None
+        if isinstance(question, CheckboxQuestion):
+            return question.get_mask(answer)
+        elif isinstance(question, MultipleChoiceQuestion):
+            return question.get_options().index(answer.content)
+        elif isinstance(question, YesNoQuestion):
+            return int(answer.content)
+        elif -2 ** 63 <= answer.content < 2 ** 63:
+            return answer.content
+        return None
+
+    def _decode(self, question: Question, code: int) -> Any:
+        """
+        Return the content of the answer to <question> encoded as <code>.
+        """
+        if isinstance(question, CheckboxQuestion):
+            return [option for i, option in enumerate(question.get_options())
+                    if code >> i & 1]
+        elif isinstance(question, MultipleChoiceQuestion):
+            return question.get_options()[code]
+        elif isinstance(question, YesNoQuestion):
+            return code == 1
+        return code
+
+
+class _AnswerRow:
+    """
+    A student's answers, as stored in one row of an AnswerStore. It can be used
+    in place of a dictionary mapping each question's id to an answer.
+
+    === Private Attributes ===
+    _store: the store this row belongs to
+    _row: the index of this row in _store
+    """
+
+    _store: AnswerStore
+    _row: int
+
+    def __init__(self, store: AnswerStore, row: int) -> None:
+        """ Initialize a view of row <row> of <store> """
+        self._store = store
+        self._row = row
+
+    def __contains__(self, question_id: int) -> bool:
+        """
+        Return True iff this row has an answer to the question with id
+        <question_id>.
+        """
+        return self._store.get(self._row, question_id) is not None
+
+    def __getitem__(self, question_id: int) -> Answer:
+        """
+        Return this row's answer to the question with id <question_id>.
+
+        Raise a KeyError if there is no such answer.
+        """
+        answer = self._store.get(self._row, question_id)
+        if answer is None:
+            raise KeyError(question_id)
+        return answer
+
+    def __setitem__(self, question_id: int, answer: Answer) -> None:
+        """
+        Record <answer> as this row's answer to the question with id
+        <question_id>.
+        """
+        self._store.set(self._row, question_id, answer)
+
+    def __iter__(self) -> Iterator[int]:
+        """ Return an iterator over the ids of the questions answered """
+        return iter(self._store.question_ids(self._row))
+
+    def items(self) -> List[Tuple[int, Answer]]:
+        """ Return a list of (question id, answer) tuples for this row """
+        return [(question_id, self[question_id]) for question_id in self]
+
+
+class _ValidityRow:
+    """
+    The validity of a student's answers, as stored in one row of an
+    AnswerStore. It can be used in place of a dictionary mapping each question's
+    id to True iff the answer to it is valid.
+
+    === Private Attributes ===
+    _store: the store this row belongs to
+    _row: the index of this row in _store
+    """
+
+    _store: AnswerStore
+    _row: int
+
+    def __init__(self, store: AnswerStore, row: int) -> None:
+        """ Initialize a view of the validity of row <row> of <store> """
+        self._store = store
+        self._row = row
+
+    def get(self, question_id: int, default: Optional[bool] = None) \
+            -> Optional[bool]:
+        """
+        Return True iff this row's answer to the question with id
+        <question_id> is valid, or <default> if there is no such answer.
+        """
+        valid = self._store.is_valid(self._row, question_id)
+        return default if valid is None else valid
+
+    def __setitem__(self, question_id: int, valid: bool) -> None:
+        """
+        Record whether this row's answer to the question with id <question_id>
+        is valid.
+        """
+        self._store.set_valid(self._row, question_id, valid)
+
+
+class AffinityMatrix:
+    """
+    The similarity between the answers of every two students in a course to
+    each question in a survey.
+
+    === Private Attributes ===
+    _questions: the questions this matrix was built for
+    _students: the students this matrix was built for, in the order of its
+              rows and columns
+    _versions: the i-th element is the answer_version of _students[i] when
+              the similarities in row i were last calculated
+    _index: a dictionary mapping each student's id to its row in this matrix
+    _layers: a dictionary mapping each question's id to a flat array, where the
+              entry at index i * len(_students) + j is the similarity between
+              the answers of the students in rows i and j to that question
+
+    === Representation Invariants ===
+    Each key in _index is the id of the student at its value in _students
+    An entry in _layers is 0.0 if either of its students has no valid answer
+    """
+
+    _questions: List[Question]
+    _students: List[Student]
+    _versions: List[int]
+    _index: Dict[int, int]
+    _layers: Dict[int, array]
+
+    def __init__(self, questions: List[Question],
+                 students: List[Student]) -> None:
+        """
+        Initialize a matrix with the similarities between the answers of every
+        two students in <students> to every question in <questions>.
+
+        === Precondition ===
+        No two students in <students> have the same id
+        """
+        self._questions = list(questions)
+        self._students = list(students)
+        self._versions = [s.answer_version for s in self._students]
+        self._index = {s.id: i for i, s in enumerate(self._students)}
+        self._layers = {}
+        n = len(self._students)
+        for question in questions:
+            answers = [s.get_answer(question) for s in self._students]
+            rows = [i for i in range(n)
+                    if self._students[i].has_answer(question)]
+            similarities = question.similarity_matrix([answers[i]
+                                                       for i in rows])
+            layer = array('d', bytes(8 * n * n))
+            for i, row in zip(rows, similarities):
+                base = i * n
+                for j, similarity in zip(rows, row):
+                    layer[base + j] = similarity
+            self._layers[question.id] = layer
+
+    def rows(self, students: List[Student]) -> Optional[List[int]]:
+        """
+        Return the rows of <students> in this matrix, in the same order as
+        <students>, or None if any of <students> is not in this matrix.
+
+        The similarities of any of <students> whose answers have changed since
+        they were calculated are calculated again first.
+
+        >>> from course import Student
+        >>> q = NumericQuestion(1, 'Hours?', 0, 4)
+        >>> s1, s2 = Student(1, 'A'), Student(2, 'B')
+        >>> s1.set_answer(q, Answer(0))
+        >>> s2.set_answer(q, Answer(4))
+        >>> matrix = AffinityMatrix([q], [s1, s2])
+        >>> matrix.pair_similarities(q, matrix.rows([s1, s2]))
+        [0.0]
+        >>> s2.set_answer(q, Answer(1))
+        >>> matrix.pair_similarities(q, matrix.rows([s1, s2]))
+        [0.75]
+        """
+        rows = []
+        for student in students:
+            row = self._index.get(student.id)
+            if row is None or self._students[row] is not student:
+                return None
+            rows.append(row)
+        for row in rows:
+            if self._students[row].answer_version != self._versions[row]:
+                self._recalculate(row)
+        return rows
+
+    def _recalculate(self, row: int) -> None:
+        """
+        Calculate the similarities in row <row> and column <row> of this
+        matrix again from the current answers of the students.
+        """
+        student = self._students[row]
+        n = len(self._students)
+        for question in self._questions:
+            layer = self._layers[question.id]
+            base = row * n
+            for other in range(n):
+                layer[base + other] = 0.0
+                layer[other * n + row] = 0.0
+            if not student.has_answer(question):
+                continue
+            others = [i for i in range(n)
+                      if self._students[i].has_answer(question)]
+            similarities = question.similarity_to_many(
+                student.get_answer(question),
+                [self._students[i].get_answer(question) for i in others])
+            for other, similarity in zip(others, similarities):
+                layer[base + other] = similarity
+                layer[other * n + row] = similarity
+        self._versions[row] = student.answer_version
+
+    def pair_similarities(self, question: Question,
+                          rows: List[int]) -> List[float]:
+        """
+        Return the similarities between the answers to <question> of every
+        two students in <rows>, in the same order as
+        HomogeneousCriterion.score_answers compares them.
+
+        === Precondition ===
+        <question> was one of the questions this matrix was built for
+        """
+        layer = self._layers[question.id]
+        n = len(self._students)
+        similarities = []
+        for i in range(len(rows) - 1):
+            base = rows[i] * n
+            for j in range(i + 1, len(rows)):
+                similarities.append(layer[base + rows[j]])
+        return similarities
+
+    def similarity_rows(self, question: Question,
+                        rows: List[int]) -> List[List[float]]:
+        """
+        Return a list of lists whose element [i][j] is the similarity between
+        the answers to <question> of the students in rows[i] and rows[j].
+
+        === Precondition ===
+        <question> was one of the questions this matrix was built for
+        """
+        layer = self._layers[question.id]
+        n = len(self._students)
+        return [[layer[row * n + other] for other in rows] for row in rows]
+
+
+class ScoringPlan:
+    """
+    A plan for scoring groups of some students with a survey, compiled once by
+    Survey.compile: the survey's questions with their criteria and weights in
+    the order score_students scores them, and every student's answers gathered
+    by question, so that a group is scored from the indices of its members
+    without looking anything up in the survey or the students again.
+
+    A plan does not change after it is compiled. Survey.compile compiles a
+    new one when the survey's weights or criteria, or the students' answers,
+    have changed since.
+
+    === Public Attributes ===
+    students: the students this plan scores; a group is given as the indices
+        of its members in this tuple
+    terms: the (question, criterion, weight) tuples of the survey, in the order
+        score_students scores them
+    pairwise: the i-th element is True iff the criterion of terms[i] is a
+        HomogeneousCriterion or a HeterogeneousCriterion
+    answers: the i-th element is a tuple whose s-th element is the answer of
+        students[s] to the question in terms[i]
+    valid: the s-th element is True iff students[s] has a valid answer to
+        every question in the survey
+
+    === Private Attributes ===
+    _kernels: the i-th element is the score_valid_answers method of the
+        criterion of terms[i]
+    _version: the version of the survey this plan was compiled at
+    _answer_versions: the s-th element is the answer_version of students[s]
+        when this plan was compiled
+    _index: a dictionary mapping the id of each student in students to their
+        index
+
+    === Representation Invariants ===
+    students, valid and every tuple in answers have the same length
+    terms, pairwise, answers and _kernels have the same length
+    """
+
+    students: Tuple[Student, ...]
+    terms: Tuple[Tuple[Question, Criterion, int], ...]
+    pairwise: Tuple[bool, ...]
+    answers: Tuple[Tuple[Answer, ...], ...]
+    valid: Tuple[bool, ...]
+    _kernels: Tuple[Callable[[Question, List[Answer]], float], ...]
+    _version: int
+    _answer_versions: Tuple[int, ...]
+    _index: Dict[int, int]
+
+    def __init__(self, terms: Tuple[Tuple[Question, Criterion, int], ...],
+                 students: List[Student], version: int) -> None:
+        """
+        Initialize a plan for scoring groups of <students> with the terms
+        <terms> of a survey at version <version>.
+
+        === Precondition ===
+        No two students in <students> have the same id
+        """
+        self.students = tuple(students)
+        self.terms = terms
+        self.pairwise = tuple(type(c) is HomogeneousCriterion or
+                              type(c) is HeterogeneousCriterion
+                              for _, c, _ in terms)
+        self.answers = tuple(tuple(s.get_answer(q) for s in self.students)
+                             for q, _, _ in terms)
+        self.valid = tuple(all(s.has_answer(q) for q, _, _ in terms)
+                           for s in self.students)
+        self._kernels = tuple(c.score_valid_answers for _, c, _ in terms)
+        self._version = version
+        self._answer_versions = tuple(s.answer_version for s in self.students)
+        self._index = {s.id: i for i, s in enumerate(self.students)}
+
+    def __len__(self) -> int:
+        """ Return the number of students this plan scores """
+        return len(self.students)
+
+    def is_current(self, version: int, students: List[Student]) -> bool:
+        """
+        Return True iff this plan was compiled for exactly <students>, in the
+        same order, at the survey version <version>, and none of their answers
+        have changed since.
+        """
+        return version == self._version and \
+            len(students) == len(self.students) and \
+            all(s is t and s.answer_version == v for s, t, v in
+                zip(students, self.students, self._answer_versions))
+
+    def indices(self, students: List[Student]) -> Optional[List[int]]:
+        """
+        Return the indices of <students> in this plan, in the same order as
+        <students>, or None if any of <students> is not in this plan.
+        """
+        indices = []
+        for student in students:
+            index = self._index.get(student.id)
+            if index is None or self.students[index] is not student:
+                return None
+            indices.append(index)
+        return indices
+
+    def score(self, group: List[int]) -> float:
+        """
+        Return the score that Survey.score_students gives the students at the
+        indices <group>, calculated in the same way from the gathered answers
+        (but without the similarities of an affinity matrix).
+
+        >>> from course import Student
+        >>> q = YesNoQuestion(1, 'Pizza?')
+        >>> s1, s2, s3 = Student(1, 'A'), Student(2, 'B'), Student(3, 'C')
+        >>> s1.set_answer(q, Answer(True))
+        >>> s2.set_answer(q, Answer(False))
+        >>> s3.set_answer(q, Answer(True))
+        >>> plan = Survey([q]).compile([s1, s2, s3])
+        >>> plan.score([0, 2]), plan.score([0, 1, 2])
+        (1.0, 0.3333333333333333)
+        """
+        if not self.terms or not group:
+            return 0.0
+        for s in group:
+            if not self.valid[s]:
+                return 0
+        total = 0
+        try:
+            for i, kernel in enumerate(self._kernels):
+                column = self.answers[i]
+                total += kernel(self.terms[i][0],
+                                [column[s] for s in group]) * self.terms[i][2]
+        except InvalidAnswerError:
+            return 0
+        return total / len(self.terms)
+
+
 class Survey:
     """
     A survey containing questions as well as criteria and weights used to
@@ -385,6 +1407,24 @@ class Survey:
               question does not have an associated criterion in _criteria
     _default_weight: a weight to use to evaluate a question if the
               question does not have an associated weight in _weights
+    _affinity: the pairwise similarities of the answers of the students in
+              the course this survey was last prepared for with
+              build_affinity, or None if it was never prepared for a course
+    _answer_store: the columnar store holding the answers of the students
+              added with store_answers, or None if no students were added
+    _version: the number of times a weight or criterion of this survey was
+              set
+    _terms: the (question, criterion, weight) tuples of this survey, in the
+              order score_students scores them, as of _version
+    _plan: the plan compile returned last, or None if it was never called
+    _cache: a dictionary mapping the ids of each set of students that was
+              scored recently to a tuple of the _version it was scored at, a
+              dictionary mapping each id to the student and their
+              answer_version at the time, and its score, from the least
+              recently used to the most
+    _cache_size: the most entries to keep in _cache
+    _hits: the number of scores looked up in _cache
+    _misses: the number of scores calculated because they were not in _cache
 
     === Representation Invariants ===
     No two questions on this survey have the same id
@@ -393,6 +1433,7 @@ class Survey:
     Each key in _weights occurs as a key in _questions
     Each value in _weights is greater than 0
     _default_weight > 0
+    len(_cache) <= _cache_size
     """
 
     _questions: Dict[int, Question]
@@ -400,18 +1441,56 @@ class Survey:
     _weights: Dict[int, int]
     _default_criterion: Criterion
     _default_weight: int
-
-    def __init__(self, questions: List[Question]) -> None:
+    _affinity: Optional[AffinityMatrix]
+    _answer_store: Optional[AnswerStore]
+    _version: int
+    _terms: Tuple[Tuple[Question, Criterion, int], ...]
+    _plan: Optional[ScoringPlan]
+    _cache: OrderedDict[FrozenSet[int],
+                        Tuple[int, Dict[int, Tuple[Student, int]], float]]
+    _cache_size: int
+    _hits: int
+    _misses: int
+
+    def __init__(self, questions: List[Question],
+                 cache_size: int = SCORE_CACHE_SIZE) -> None:
         """
         Initialize a new survey that contains every question in <questions>.
         This new survey should use a HomogeneousCriterion as a default criterion
         and should use 1 as a default weight.
+
+        The scores of up to <cache_size> sets of students are remembered, so
+        that scoring them again only looks the score up.
+
+        === Precondition ===
+        cache_size >= 0
         """
         self._questions = {question.id: question for question in questions}
         self._criteria = {}
         self._weights = {}
         self._default_criterion = HomogeneousCriterion()
         self._default_weight = 1
+        self._affinity = None
+        self._answer_store = None
+        self._version = 0
+        self._terms = ()
+        self._plan = None
+        self._compile_terms()
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._hits = 0
+        self._misses = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Return the state of this survey to pickle, without the scores and
+        the plan it remembers, so that copies sent to other processes stay
+        small.
+        """
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_plan'] = None
+        return state
 
     def __len__(self) -> int:
         """ Return the number of questions in this survey """
@@ -468,6 +1547,36 @@ class Survey:
             return self._default_weight
         return self._weights[question.id]
 
+    def scoring_terms(self) -> List[Tuple[Question, Criterion, int]]:
+        """
+        Return a list of (question, criterion, weight) tuples, one for each
+        question in this survey, in the order score_students scores them.
+        """
+        return list(self._terms)
+
+    def compile(self, students: List[Student]) -> ScoringPlan:
+        """
+        Return a plan for scoring groups of <students> with this survey.
+
+        The plan returned last is returned again if it was compiled for the
+        same students in the same order, and neither the weights and criteria
+        of this survey nor the answers of the students have changed since.
+
+        === Precondition ===
+        No two students in <students> have the same id
+        """
+        if self._plan is None or \
+                not self._plan.is_current(self._version, students):
+            self._plan = ScoringPlan(self._terms, students, self._version)
+        return self._plan
+
+    def _compile_terms(self) -> None:
+        """
+        Gather the criterion and weight of every question into self._terms.
+        """
+        self._terms = tuple((q, self._get_criterion(q), self._get_weight(q))
+                            for q in self._questions.values())
+
     def set_weight(self, weight: int, question: Question) -> bool:
         """
         Set the weight associated with <question> to <weight> and return True.
@@ -480,6 +1589,8 @@ class Survey:
         if question.id not in self._questions.keys():
             return False
         self._weights[question.id] = weight
+        self._version += 1
+        self._compile_terms()
         return True
 
     def set_criterion(self, criterion: Criterion, question: Question) -> bool:
@@ -493,8 +1604,55 @@ class Survey:
         if question.id not in self._questions.keys():
             return False
         self._criteria[question.id] = criterion
+        self._version += 1
+        self._compile_terms()
         return True
 
+    def build_affinity(self, course: Course) -> AffinityMatrix:
+        """
+        Compute the similarity between the answers of every two students in
+        <course> to every question in this survey once, so that score_students
+        can look them up instead of comparing the answers again.
+
+        Only one course is prepared at a time. When a student in <course>
+        changes their answers, their similarities are calculated again the next
+        time score_students scores them.
+
+        >>> from course import Course, Student
+        >>> q = YesNoQuestion(1, 'Pizza?')
+        >>> s1, s2 = Student(1, 'A'), Student(2, 'B')
+        >>> s1.set_answer(q, Answer(True))
+        >>> s2.set_answer(q, Answer(True))
+        >>> course = Course('148')
+        >>> course.enroll_students([s1, s2])
+        >>> survey = Survey([q])
+        >>> _ = survey.build_affinity(course)
+        >>> survey.score_students([s1, s2])
+        1.0
+        >>> s2.set_answer(q, Answer(False))
+        >>> survey.score_students([s1, s2])
+        0.0
+        """
+        self._affinity = AffinityMatrix(self.get_questions(),
+                                        list(course.get_students()))
+        return self._affinity
+
+    def store_answers(self, students: List[Student]) -> AnswerStore:
+        """
+        Move the answers of <students> into the columnar answer store of this
+        survey, creating it on the first call, and return the store.
+
+        The students' get_answer and set_answer methods keep working, but read
+        from and write to the store from now on.
+
+        === Precondition ===
+        No two students added to this survey's store have the same id
+        """
+        if self._answer_store is None:
+            self._answer_store = AnswerStore(self.get_questions())
+        self._answer_store.add_students(students)
+        return self._answer_store
+
     def score_students(self, students: List[Student]) -> float:
         """
         Return a quality score for <students> calculated based on their answers
@@ -512,27 +1670,208 @@ class Survey:
         If an InvalidAnswerError would be raised by calling this method, or if
         there are no questions in <self>, this method should return zero.
 
+        The score of each set of students is remembered until the weights or
+        criteria of this survey or the answers of one of the students change,
+        for up to the cache size of this survey of the most recently scored
+        sets. Scoring the same students again in any order returns the
+        remembered score, which may differ from the score of that order by
+        floating point rounding error.
+
         === Precondition ===
         All students in <students> have an answer to all questions in this
             survey
         """
         if self._questions.__len__() == 0 or students == []:
             return 0.0
+        key = frozenset(s.id for s in students)
+        if self._cache_size == 0 or len(key) != len(students):
+            return self._score_students(students)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == self._version and \
+                all(entry[1][s.id][0] is s and
+                    entry[1][s.id][1] == s.answer_version for s in students):
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+        self._misses += 1
+        score = self._score_students(students)
+        self._cache[key] = (self._version,
+                            {s.id: (s, s.answer_version) for s in students},
+                            score)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return score
+
+    def _score_students(self, students: List[Student]) -> float:
+        """
+        Return score_students for <students>, without looking it up in the
+        scores this survey remembers.
+
+        === Precondition ===
+        <students> is not empty and this survey has at least one question
+        """
+        # Each student recorded whether their answers are valid when they
+        # answered, so no answer needs to be validated again here.
+        for q, _, _ in self._terms:
+            for s in students:
+                if not s.has_answer(q):
+                    return 0
+        rows = None
+        if self._affinity is not None:
+            rows = self._affinity.rows(students)
         total = 0
-        question_count = 0
         try:
-            for q in self._questions.items():
-                answers = []
-                for s in students:
-                    answers.append(s.get_answer(q[1]))
-                criterion = self._get_criterion(q[1])
-                score = criterion.score_answers(q[1], answers)
-                weight = self._get_weight(q[1])
+            for q, criterion, weight in self._terms:
+                kind = type(criterion)
+                if rows is not None and (kind is HomogeneousCriterion or
+                                         kind is HeterogeneousCriterion):
+                    score = self._affinity_score(q, rows)
+                    if kind is HeterogeneousCriterion:
+                        score = 1 - score
+                else:
+                    score = criterion.score_valid_answers(
+                        q, [s.get_answer(q) for s in students])
                 total += score * weight
-                question_count += 1
         except InvalidAnswerError:
             return 0
-        return total / question_count
+        return total / len(self._terms)
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Return a dictionary with the number of scores score_students looked up
+        ('hits') and calculated ('misses') since this survey was created or its
+        cache cleared, and the number of scores it remembers ('currsize') and
+        can remember ('maxsize').
+
+        >>> from course import Student
+        >>> q = YesNoQuestion(1, 'Pizza?')
+        >>> s1, s2 = Student(1, 'A'), Student(2, 'B')
+        >>> s1.set_answer(q, Answer(True))
+        >>> s2.set_answer(q, Answer(True))
+        >>> survey = Survey([q])
+        >>> survey.score_students([s1, s2])
+        1.0
+        >>> survey.score_students([s2, s1])
+        1.0
+        >>> s2.set_answer(q, Answer(False))
+        >>> survey.score_students([s1, s2])
+        0.0
+        >>> survey.cache_info() == {'hits': 1, 'misses': 2, 'currsize': 1,
+        ...                         'maxsize': SCORE_CACHE_SIZE}
+        True
+        """
+        return {'hits': self._hits, 'misses': self._misses,
+                'currsize': len(self._cache), 'maxsize': self._cache_size}
+
+    def cache_clear(self) -> None:
+        """
+        Forget every score this survey remembers, and reset the numbers of
+        hits and misses reported by cache_info.
+        """
+        self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def _affinity_score(self, question: Question, rows: List[int]) -> float:
+        """
+        Return the score a HomogeneousCriterion would give the answers to
+        <question> of the students in <rows> of self._affinity, from the
+        similarities looked up in self._affinity.
+
+        === Precondition ===
+        <rows> is not empty and the students in <rows> all have a valid answer
+            to <question>
+        """
+        if len(rows) == 1:
+            return 1.0
+        similarities = self._affinity.pair_similarities(question, rows)
+        return sum(similarities) / len(similarities)
+
+    def score_pairs(self, students: List[Student]) -> List[List[float]]:
+        """
+        Return a list of lists whose element [i][j] is score_students for
+        students[i] and students[j], for every i != j. Element [i][i] is 0.0.
+
+        Answers with the same content score the same with any other answer,
+        so for each question every two distinct answers are scored only once,
+        and the scores of the students' pairs are looked up from those. The
+        similarities of the answers to questions scored with a
+        HomogeneousCriterion or a HeterogeneousCriterion are instead looked up
+        in the affinity matrix built by build_affinity, if it was built for
+        <students>. The scores may differ from score_students by floating point
+        rounding error.
+
+        >>> from course import Student
+        >>> q = YesNoQuestion(1, 'Pizza?')
+        >>> s1, s2, s3 = Student(1, 'A'), Student(2, 'B'), Student(3, 'C')
+        >>> s1.set_answer(q, Answer(True))
+        >>> s2.set_answer(q, Answer(False))
+        >>> s3.set_answer(q, Answer(True))
+        >>> Survey([q]).score_pairs([s1, s2, s3])
+        [[0.0, 0.0, 1.0], [0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]
+        """
+        n = len(students)
+        totals = [[0.0] * n for _ in range(n)]
+        if len(self._questions) == 0:
+            return totals
+        valid = [i for i in range(n)
+                 if all(students[i].has_answer(q)
+                        for q, _, _ in self._terms)]
+        m = len(valid)
+        rows = None
+        if self._affinity is not None:
+            rows = self._affinity.rows([students[i] for i in valid])
+        # The weighted scores of the pairs of valid students, by their index
+        # in valid, added up over the questions.
+        scores = [[0.0] * m for _ in range(m)]
+        failed = set()
+        for q, criterion, weight in self._terms:
+            kind = type(criterion)
+            answers = [students[i].get_answer(q) for i in valid]
+            if rows is not None and (kind is HomogeneousCriterion or
+                                     kind is HeterogeneousCriterion):
+                matrix = self._affinity.similarity_rows(q, rows)
+                for x in range(m):
+                    if kind is HeterogeneousCriterion:
+                        scores[x] = [t + (1 - s) * weight
+                                     for t, s in zip(scores[x], matrix[x])]
+                    else:
+                        scores[x] = [t + s * weight
+                                     for t, s in zip(scores[x], matrix[x])]
+                continue
+            codes = {}
+            distinct = []
+            for answer in answers:
+                if codes.setdefault(repr(answer.content),
+                                    len(codes)) == len(distinct):
+                    distinct.append(answer)
+            column = [codes[repr(answer.content)] for answer in answers]
+            table = _pair_table(q, criterion, distinct)
+            expanded = [[None if table_row[c] is None else
+                         table_row[c] * weight for c in column]
+                        for table_row in table]
+            for x in range(m):
+                pair_scores = expanded[column[x]]
+                if None in pair_scores:
+                    failed.update((min(x, y), max(x, y)) for y in range(m)
+                                  if pair_scores[y] is None)
+                    pair_scores = [0.0 if score is None else score
+                                   for score in pair_scores]
+                scores[x] = [t + score
+                             for t, score in zip(scores[x], pair_scores)]
+        count = len(self._questions)
+        for x, y in failed:
+            scores[x][y] = scores[y][x] = 0.0
+        for x, i in enumerate(valid):
+            scores[x][x] = 0.0
+            if m == n:
+                totals[i] = [score / count for score in scores[x]]
+            else:
+                row = totals[i]
+                for j, score in zip(valid, scores[x]):
+                    row[j] = score / count
+        return totals
 
     def score_grouping(self, grouping: Grouping) -> float:
         """ Return a score for <grouping> calculated based on the answers of
@@ -560,10 +1899,41 @@ class Survey:
         return total / group_count
 
 
+def _pair_table(question: Question, criterion: Criterion,
+                answers: List[Answer]) -> List[List[Optional[float]]]:
+    """
+    Return a list of lists whose element [i][j] is the score <criterion> gives
+    answers[i] and answers[j] to <question> together, or None if it raises an
+    InvalidAnswerError for them.
+
+    === Precondition ===
+    All answers in <answers> are valid answers to <question>
+    """
+    kind = type(criterion)
+    if kind is HomogeneousCriterion:
+        return question.similarity_matrix(answers)
+    if kind is HeterogeneousCriterion:
+        return [[1 - similarity for similarity in row]
+                for row in question.similarity_matrix(answers)]
+    table = []
+    for answer in answers:
+        table_row = []
+        for other in answers:
+            try:
+                table_row.append(criterion.score_valid_answers(
+                    question, [answer, other]))
+            except InvalidAnswerError:
+                table_row.append(None)
+        table.append(table_row)
+    return table
+
+
 if __name__ == "__main__":
     import python_ta
 
     python_ta.check_all(config={"extra-imports": ["typing",
+                                                  "array",
+                                                  "collections",
                                                   "criterion",
                                                   "course",
                                                   "grouper"]})